@@ -1,10 +1,98 @@
 from PyQt5.QtWidgets import QApplication, QMainWindow, QGridLayout, QLabel, QWidget
 from PyQt5.QtGui import QImage, QPixmap
-from PyQt5.QtCore import QTimer
+from PyQt5.QtCore import QTimer, QThread, pyqtSignal
 import cv2
+import threading
 import numpy as np
+from contextlib import contextmanager
 from PersonFollower import PersonFollower
-import tensorflow as tf
+from Instrumentation import format_stats
+
+class ImagePanel:
+    '''
+    A grid cell showing an image. `source` returns a context manager
+    yielding (seq, image, is_bgr), holding the image for as long as the
+    panel reads it; the panel only redraws when seq changes. The render worker scales and
+    color-converts into `buffer`, which it won't touch again until the GUI
+    has turned it into a pixmap.
+    '''
+
+    def __init__(self, name, row, column, source):
+        self.name = name
+        self.row = row
+        self.column = column
+        self.source = source
+        self.size = (0, 0)       # Label size, kept current by the GUI thread
+        self.seq = None          # Seq of the image last rendered
+        self.resized = None
+        self.buffer = None
+        self.ready = False       # buffer holds a render the GUI hasn't shown yet
+        self.lock = threading.Lock()
+
+    def render(self):
+        '''Worker thread: render the source into the buffer if it changed. Returns True if it did.'''
+        width, height = self.size
+        if width <= 0 or height <= 0:
+            return False
+        with self.source() as (seq, image, is_bgr):
+            if image is None or seq == self.seq:
+                return False
+            return self._render(seq, image, is_bgr, width, height)
+
+    def _render(self, seq, image, is_bgr, width, height):
+        with self.lock:
+            if self.ready:
+                return False  # GUI is behind; skip rather than queue
+
+            # Fit the label, keeping the aspect ratio
+            scale = min(width / image.shape[1], height / image.shape[0])
+            shape = (max(1, int(image.shape[0] * scale)), max(1, int(image.shape[1] * scale)), 3)
+            if self.buffer is None or self.buffer.shape != shape:
+                self.resized = np.empty(shape, dtype=np.uint8)
+                self.buffer = np.empty(shape, dtype=np.uint8)
+            cv2.resize(image, (shape[1], shape[0]), dst=self.resized, interpolation=cv2.INTER_AREA)
+            if is_bgr:
+                cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.buffer)
+            else:
+                np.copyto(self.buffer, self.resized)
+            self.seq = seq
+            self.ready = True
+        return True
+
+    def take_pixmap(self):
+        '''GUI thread: turn the pending render into a pixmap and free the buffer.'''
+        with self.lock:
+            if not self.ready:
+                return None
+            height, width, _ = self.buffer.shape
+            image = QImage(self.buffer.data, width, height, self.buffer.strides[0], QImage.Format_RGB888)
+            pixmap = QPixmap.fromImage(image)  # Copies, so the buffer can be reused
+            self.ready = False
+        return pixmap
+
+class RenderWorker(QThread):
+    '''Polls the panels' sources off the GUI thread and renders the ones that changed.'''
+    rendered = pyqtSignal(int)
+
+    def __init__(self, panels, interval_ms=15):
+        super().__init__()
+        self.panels = panels
+        self.interval_ms = interval_ms
+        self.running = True
+
+    def run(self):
+        while self.running:
+            for index, panel in enumerate(self.panels):
+                try:
+                    if panel.render():
+                        self.rendered.emit(index)
+                except Exception as e:
+                    print(f"Error rendering {panel.name} panel: {e}")
+            self.msleep(self.interval_ms)
+
+    def stop(self):
+        self.running = False
+        self.wait()
 
 class Dashboard(QMainWindow):
     def __init__(self, person_follower: PersonFollower):
@@ -17,56 +105,75 @@ class Dashboard(QMainWindow):
         self.setCentralWidget(self.central_widget)
         self.grid_layout = QGridLayout(self.central_widget)
 
-        # Create 3x3 grid of labels
+        # Create 3x3 grid of labels. Panels are rendered at label size, so
+        # Qt doesn't need to scale them.
         self.labels = [[QLabel(self) for _ in range(3)] for _ in range(3)]
         for i in range(3):
             for j in range(3):
                 self.labels[i][j].setStyleSheet("border: 1px solid black;")
-                self.labels[i][j].setScaledContents(True)
+                self.labels[i][j].setMinimumSize(1, 1)
                 self.grid_layout.addWidget(self.labels[i][j], i, j)
 
         # PersonFollower instance
         self.person_follower = person_follower
 
-        # Timer to update pantilt feed
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_pantilt_view)
-        self.timer.start(17)  # ~30 FPS
-
-    def update_model_input_view(self, input_tensor):
-        # Convert the tensor to a numpy array for visualization
-        display_tensor = self.person_follower.get_latest_input_tensor() # Remove unnecessary dimensions
+        # Live image panels: the annotated pan/tilt feed and the model input,
+        # then any other cameras around the main feed
+        self.panels = [
+            ImagePanel("annotated", 1, 1, self._annotated_source),
+            ImagePanel("input", 0, 1, self._input_source),
+        ]
+        for index, (row, column) in enumerate([(1, 0), (1, 2), (2, 1), (2, 0), (2, 2)], start=1):
+            if index < len(self.person_follower.cameras):
+                self.panels.append(ImagePanel(f"camera {index}", row, column, self._camera_source(index)))
+        self.render_worker = RenderWorker(self.panels)
+        self.render_worker.rendered.connect(self.show_panel)
+        self.render_worker.start()
 
-        # Scale the values back to [0,255] for visualization purposes
-        display_tensor = (display_tensor * 255).astype(np.uint8)
+        # Latency stats panel, refreshed twice a second
+        self.labels[0][0].setStyleSheet("border: 1px solid black; font-family: monospace;")
+        self.stats_timer = QTimer(self)
+        self.stats_timer.timeout.connect(self.update_stats_view)
+        self.stats_timer.start(500)
+        self.update_panel_sizes()
 
-        # Display the exact input tensor
-        height, width = display_tensor.shape
-        bytes_per_line = width
-        q_image_input = QImage(display_tensor.data, width, height, bytes_per_line, QImage.Format_Grayscale8)
-        pixmap_input = QPixmap.fromImage(q_image_input)
-        self.labels[0][1].setPixmap(pixmap_input)
+    def _annotated_source(self):
+        return self._camera_source(0)()
 
-    def update_pantilt_view(self):
-        # Get the latest frame from the person follower
-        frame = self.person_follower.get_latest_frame()
+    def _camera_source(self, index):
+        @contextmanager
+        def source():
+            with self.person_follower.read_latest_frame(index) as (seq, frame):
+                yield seq, frame, True
+        return source
 
-        if frame is None:
-            return
+    @contextmanager
+    def _input_source(self):
+        # A copy of the model input, republished only when the model runs
+        with self.person_follower.read_latest_input() as (seq, image):
+            yield seq, image, False
 
-        # Convert the frame to a format that can be displayed in the QLabel
-        height, width, channel = frame.shape
-        bytes_per_line = 3 * width
-        q_image = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(q_image)
+    def update_panel_sizes(self):
+        for panel in self.panels:
+            label = self.labels[panel.row][panel.column]
+            size = (label.width(), label.height())
+            if size != panel.size:
+                panel.size = size
+                panel.seq = None  # Re-render at the new size
 
-        # Update the QLabel with the new pixmap
-        self.labels[1][1].setPixmap(pixmap)
+    def show_panel(self, index):
+        panel = self.panels[index]
+        pixmap = panel.take_pixmap()
+        if pixmap is not None:
+            self.labels[panel.row][panel.column].setPixmap(pixmap)
 
-        # Update the model input feed for debugging
-        self.update_model_input_feed(self.person_follower.get_latest_input_tensor())
+    def update_stats_view(self):
+        # Piggyback on the slow timer to track label resizes
+        self.update_panel_sizes()
+        self.labels[0][0].setText(format_stats(self.person_follower.get_stats()))
 
     def closeEvent(self, event):
-        # Stop the person follower when closing the dashboard
+        # Stop rendering and the person follower when closing the dashboard
+        self.render_worker.stop()
         self.person_follower.stop()
         event.accept()
@@ -0,0 +1,146 @@
+import time
+
+THERMAL_ZONE = "/sys/class/thermal/thermal_zone0/temp"
+
+# Quality ladder, best first. Each step down trades some accuracy for
+# latency: capture resolution, MoveNet input size and full-detection
+# interval (detect mode only), and running the model on every Nth frame.
+LEVELS = [
+    {"resolution": (640, 480), "input_size": 256, "detect_interval": 10, "frame_stride": 1},
+    {"resolution": (640, 480), "input_size": 192, "detect_interval": 10, "frame_stride": 1},
+    {"resolution": (320, 240), "input_size": 192, "detect_interval": 15, "frame_stride": 1},
+    {"resolution": (320, 240), "input_size": 160, "detect_interval": 20, "frame_stride": 2},
+    {"resolution": (320, 240), "input_size": 128, "detect_interval": 30, "frame_stride": 3},
+]
+
+def read_temperature(path=THERMAL_ZONE):
+    '''SoC temperature in degrees C, or None where there's no thermal zone.'''
+    try:
+        with open(path) as f:
+            return int(f.read()) / 1000
+    except (OSError, ValueError):
+        return None
+
+class CpuMeter:
+    '''
+    CPU utilisation (0-1, all cores) between calls, from /proc/stat. The
+    load average would lag changes by tens of seconds.
+    '''
+
+    def __init__(self, path="/proc/stat"):
+        self.path = path
+        self.previous = self._read()
+
+    def _read(self):
+        try:
+            with open(self.path) as f:
+                fields = [int(value) for value in f.readline().split()[1:]]
+        except (OSError, ValueError):
+            return None
+        idle = fields[3] + (fields[4] if len(fields) > 4 else 0)  # idle + iowait
+        return sum(fields), idle
+
+    def read(self):
+        '''Utilisation since the last call, or None where /proc/stat isn't available.'''
+        current = self._read()
+        previous, self.previous = self.previous, current
+        if current is None or previous is None or current[0] <= previous[0]:
+            return None
+        total, idle = current[0] - previous[0], current[1] - previous[1]
+        return 1.0 - idle / total
+
+class Governor:
+    '''
+    Holds glass-to-command latency (capture to the pan/tilt command, see
+    Instrumentation.FRAME_MARKS) under a target by moving along a ladder
+    of quality levels (see LEVELS) as conditions change. Call step()
+    about once a second, e.g. as a ControlScheduler task.
+
+    It steps down a level when the p95 latency of the frames since the
+    last change is over target, the SoC is hot, or the CPU was saturated
+    over the last step. It steps back up only when latency is well under
+    target and the SoC has cooled, and only after holding the current
+    level for longer, so it doesn't oscillate between two levels.
+
+    Nothing is changed until the first step: the governor starts at the
+    level matching the camera's current resolution (or the top one), and
+    a step only sends the settings that differ from the previous level,
+    so a --resolution or --detect-interval given on the command line
+    holds until the governor actually moves past it.
+    '''
+
+    def __init__(self, person_follower, camera, target_latency_ms=150.0, levels=LEVELS,
+                 hot_temp=75.0, cool_temp=65.0, max_cpu=0.9, headroom=0.6,
+                 min_samples=15, down_hold=2.0, up_hold=10.0):
+        self.person_follower = person_follower
+        self.camera = camera
+        self.target_latency_ms = target_latency_ms
+        self.levels = levels
+        self.hot_temp = hot_temp
+        self.cool_temp = cool_temp
+        self.max_cpu = max_cpu  # Utilisation (0-1) over a step that counts as saturated
+        self.headroom = headroom  # Step up only below this fraction of the target
+        self.min_samples = min_samples
+        self.down_hold = down_hold  # Seconds at a level before stepping down...
+        self.up_hold = up_hold      # ...or up
+
+        self.histogram = person_follower.stats.histograms["glass_to_command"]
+        self.cpu_meter = CpuMeter()
+        self.changes = 0
+        self.p95 = None
+        self.temperature = None
+        self.cpu = None
+
+        frame_size = getattr(camera, "frame_size", None)
+        self.level = next((index for index, settings in enumerate(levels)
+                           if tuple(settings["resolution"]) == frame_size), 0)
+        self.changed_at = time.monotonic()
+        self.count_at_change = self.histogram.count
+
+    def apply(self, level):
+        '''Switch to a level now, sending only the settings that change.'''
+        previous, settings = self.levels[self.level], self.levels[level]
+        changed = {name: value for name, value in settings.items() if previous.get(name) != value}
+        if "resolution" in changed:
+            self.camera.set_resolution(*settings["resolution"])
+        self.person_follower.configure_inference(input_size=changed.get("input_size"),
+                                                 detect_interval=changed.get("detect_interval"),
+                                                 frame_stride=changed.get("frame_stride"))
+        self.changes += 1
+        cpu = "n/a" if self.cpu is None else f"{self.cpu:.0%}"
+        print(f"[Governor] Level {self.level} -> {level}: {self._describe(settings)} "
+              f"(p95 {self.p95:.0f} ms, temp {self.temperature}, cpu {cpu})")
+        self.level = level
+        self.changed_at = time.monotonic()
+        self.count_at_change = self.histogram.count  # Judge the new level on its own frames
+
+    def step(self):
+        now = time.monotonic()
+        self.temperature = read_temperature()
+        self.cpu = self.cpu_meter.read()
+        samples = self.histogram.count - self.count_at_change
+        if samples < self.min_samples:
+            return
+        self.p95 = self.histogram.summary(last=samples)["p95"]
+
+        hot = self.temperature is not None and self.temperature >= self.hot_temp
+        cool = self.temperature is None or self.temperature < self.cool_temp
+        held = now - self.changed_at
+        saturated = self.cpu is not None and self.cpu > self.max_cpu
+        if self.p95 > self.target_latency_ms or hot or saturated:
+            if self.level < len(self.levels) - 1 and held >= self.down_hold:
+                self.apply(self.level + 1)
+        elif self.p95 < self.target_latency_ms * self.headroom and cool and not saturated:
+            if self.level > 0 and held >= self.up_hold:
+                self.apply(self.level - 1)
+
+    def get_state(self):
+        return {"level": self.level, "changes": self.changes, "p95_ms": self.p95,
+                "temperature": self.temperature, "cpu": self.cpu,
+                "frame_size": getattr(self.camera, "frame_size", None), **self.levels[self.level]}
+
+    @staticmethod
+    def _describe(settings):
+        width, height = settings["resolution"]
+        return (f"{width}x{height}, input {settings['input_size']}, "
+                f"detect every {settings['detect_interval']}, infer every {settings['frame_stride']}")
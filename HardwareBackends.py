@@ -0,0 +1,194 @@
+import threading
+import time
+from collections import deque
+from Joystick import XBOX_AXES, XBOX_BUTTONS  # Plain maps; pygame isn't loaded
+
+# Constants for the simulated buses. Standard-mode I2C on the Pi runs at
+# 100 kHz (400 kHz if dtparam=i2c_arm_baudrate is raised); each byte is 9
+# clocks with the ACK. The fixed costs approximate one ioctl into the
+# i2c-dev driver and one round trip over the pigpiod socket.
+I2C_BUS_HZ = 100000
+I2C_TRANSACTION_OVERHEAD = 0.00005
+PIGPIO_CALL_LATENCY = 0.0001
+SIM_HISTORY = 10000  # Most recent commands/transactions a sim device keeps
+
+class PigpioESC:
+    '''ESC driven by servo pulses from the pigpio daemon.'''
+
+    def __init__(self, pin):
+        import pigpio
+
+        self.pin = pin
+        self.pi = pigpio.pi()
+        if not self.pi.connected:
+            raise RuntimeError("pigpio daemon not running")
+        self.pi.set_mode(pin, pigpio.OUTPUT)
+
+    def set_pulsewidth(self, pulse):
+        self.pi.set_servo_pulsewidth(self.pin, pulse)
+
+    def get_pulsewidth(self):
+        return self.pi.get_servo_pulsewidth(self.pin)
+
+    def close(self):
+        self.pi.set_servo_pulsewidth(self.pin, 0)
+        self.pi.stop()
+
+class PCA9685Driver:
+    '''The real PCA9685 on the Pi's I2C bus, via the Adafruit driver.'''
+
+    def __init__(self, frequency):
+        import board
+        import busio
+        from adafruit_pca9685 import PCA9685
+
+        self.i2c = busio.I2C(board.SCL, board.SDA)
+        self.pca = PCA9685(self.i2c)
+        self.pca.frequency = frequency  # Also turns on register auto-increment
+        self.frequency = self.pca.frequency
+        self.i2c_device = self.pca.i2c_device
+
+    def deinit(self):
+        self.pca.deinit()
+        self.i2c.deinit()
+
+class SimESC:
+    '''
+    Stand-in for PigpioESC. Records the last `history` commands with their
+    times and waits as long as a pigpiod socket round trip would.
+    '''
+
+    def __init__(self, pin, latency=PIGPIO_CALL_LATENCY, history=SIM_HISTORY):
+        self.pin = pin
+        self.latency = latency
+        self.pulse = 0
+        self.commands = deque(maxlen=history)  # (time.monotonic(), pulse)
+
+    def set_pulsewidth(self, pulse):
+        time.sleep(self.latency)
+        self.pulse = pulse
+        self.commands.append((time.monotonic(), pulse))
+
+    def get_pulsewidth(self):
+        time.sleep(self.latency)
+        return self.pulse
+
+    def close(self):
+        self.set_pulsewidth(0)
+
+class SimI2CDevice:
+    '''
+    Stand-in for adafruit_bus_device.I2CDevice talking to a PCA9685.
+    Keeps a 256-byte register file with auto-increment, records the last
+    `history` write transactions, and takes as long as the transfer would
+    on the wire.
+    '''
+
+    def __init__(self, bus_hz=I2C_BUS_HZ, overhead=I2C_TRANSACTION_OVERHEAD, history=SIM_HISTORY):
+        self.bus_hz = bus_hz
+        self.overhead = overhead
+        self.registers = bytearray(256)
+        self.transactions = deque(maxlen=history)  # (time.monotonic(), register, data)
+        self.busy_time = 0.0
+        self.lock = threading.Lock()
+
+    def __enter__(self):
+        self.lock.acquire()
+        return self
+
+    def __exit__(self, *exc):
+        self.lock.release()
+        return False
+
+    def _transfer(self, nbytes):
+        # Address byte plus payload, 9 clocks per byte
+        duration = self.overhead + (nbytes + 1) * 9 / self.bus_hz
+        self.busy_time += duration
+        time.sleep(duration)
+
+    def write(self, buffer, start=0, end=None):
+        data = bytes(buffer[start:end])
+        self._transfer(len(data))
+        register, payload = data[0], data[1:]
+        self.registers[register:register + len(payload)] = payload
+        self.transactions.append((time.monotonic(), register, payload))
+
+    def write_then_readinto(self, out_buffer, in_buffer, out_start=0, out_end=None, in_start=0, in_end=None):
+        out_data = bytes(out_buffer[out_start:out_end])
+        in_end = len(in_buffer) if in_end is None else in_end
+        self._transfer(len(out_data) + in_end - in_start)
+        register = out_data[0]
+        in_buffer[in_start:in_end] = self.registers[register:register + in_end - in_start]
+
+class SimPCA9685:
+    '''Stand-in for PCA9685Driver backed by a SimI2CDevice.'''
+
+    def __init__(self, frequency, bus_hz=I2C_BUS_HZ):
+        self.frequency = frequency
+        self.i2c_device = SimI2CDevice(bus_hz)
+
+    def deinit(self):
+        pass
+
+class SimJoystick:
+    '''
+    Stand-in for Joystick with no pygame device. Axes and buttons rest
+    at their idle values (triggers at -1) until set by a test or script.
+    Has the same manual_override event as JoystickService.
+    '''
+
+    def __init__(self, disabled: bool = False):
+        self.axes = {name: 0.0 for name in XBOX_AXES}
+        self.axes["LT"] = self.axes["RT"] = -1.0
+        self.buttons = {name: 0 for name in XBOX_BUTTONS}
+        self.connected = True
+        self.manual_override = threading.Event()
+
+    def start(self):
+        pass
+
+    def stop(self):
+        pass
+
+    def set_axis(self, axis_name: str, value: float):
+        if axis_name not in self.axes:
+            raise ValueError(f"Invalid axis name: {axis_name}")
+        self.axes[axis_name] = value
+
+    def set_button(self, button_name: str, pressed: bool):
+        if button_name not in self.buttons:
+            raise ValueError(f"Invalid button name: {button_name}")
+        self.buttons[button_name] = int(pressed)
+
+    def read_throttle(self) -> float:
+        rt = (self.axes["RT"] + 1) / 2
+        lt = (self.axes["LT"] + 1) / 2
+        return rt if rt > 0.005 else -lt
+
+    def wait_for_connection(self):
+        pass
+
+    def is_connected(self):
+        return self.connected
+
+    def get_axis(self, axis_name: str, limit_perc: float = 100):
+        if axis_name not in self.axes:
+            raise ValueError(f"Invalid axis name: {axis_name}")
+        return self.axes[axis_name] * (limit_perc / 100)
+
+    def get_button(self, button_name: str):
+        if button_name not in self.buttons:
+            raise ValueError(f"Invalid button name: {button_name}")
+        return self.buttons[button_name]
+
+    def update_connection_status(self):
+        pass
+
+def create_backends(name, esc_pin, servo_frequency):
+    '''Return (esc, pca) for "hardware" or "sim".'''
+    if name == "hardware":
+        return PigpioESC(esc_pin), PCA9685Driver(servo_frequency)
+    elif name == "sim":
+        return SimESC(esc_pin), SimPCA9685(servo_frequency)
+    else:
+        raise ValueError("Invalid backend. Use 'hardware' or 'sim'.")
@@ -0,0 +1,170 @@
+import os
+import numpy as np
+
+class KerasEngine:
+    '''
+    Runs a TensorFlow SavedModel eagerly through tensorflow_hub.KerasLayer.
+    Heavy, but works with any SavedModel and needs no conversion step.
+    '''
+
+    def __init__(self, model_path, input_shape=(None, 128, 128, 3), input_dtype=np.float32,
+                 signature=None, output_key=None):
+        import tensorflow_hub as hub
+
+        if not os.path.exists(os.path.join(model_path, "saved_model.pb")):
+            raise FileNotFoundError(f"Model not found at {model_path}. Please ensure the directory contains `saved_model.pb`.")
+        print("Loading SavedModel through KerasLayer from:", model_path)
+        if signature:
+            # Signature models (e.g. MoveNet) return a dict; pick one output
+            self.model = hub.KerasLayer(model_path, trainable=False, signature=signature, output_key=output_key)
+        else:
+            self.model = hub.KerasLayer(model_path, trainable=False)
+        self.model.build(list(input_shape))
+
+        self.name = "keras"
+        self.input_shape = tuple(1 if dim is None else dim for dim in input_shape)
+        self.input_dtype = input_dtype
+        self.input_quantization = (0.0, 0)
+        self.input_buffer = np.zeros(self.input_shape, dtype=self.input_dtype)
+
+    def predict(self, batch):
+        '''Run inference on a batch and return the first output as a numpy array.'''
+        return self.model(batch).numpy()
+
+    def resize_input(self, input_shape):
+        '''Change the input shape: the batch size, or the image size for models that accept any, like MoveNet.'''
+        self.input_shape = tuple(input_shape)
+        self.input_buffer = np.zeros(self.input_shape, dtype=self.input_dtype)
+
+class TFLiteEngine:
+    '''
+    Runs a .tflite model through the TFLite interpreter (XNNPACK on the Pi).
+    Tensors are allocated once; every call reuses the same input and
+    output buffers so steady-state inference doesn't allocate.
+
+    Models with a dynamic input (-1 dims in the shape signature, like
+    MoveNet multipose, which otherwise allocates a 1x1 image) are resized
+    to input_shape first; None dims become 1.
+    '''
+
+    def __init__(self, model_path, num_threads=None, input_shape=None):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"TFLite model not found at {model_path}. Run convert_pb_to_tflite.py first.")
+
+        try:
+            from tflite_runtime.interpreter import Interpreter
+        except ImportError:
+            import tensorflow as tf
+            Interpreter = tf.lite.Interpreter
+
+        num_threads = num_threads or os.cpu_count()
+        print(f"Loading TFLite model from {model_path} with {num_threads} threads")
+        self.interpreter = Interpreter(model_path=model_path, num_threads=num_threads)
+        self.interpreter.allocate_tensors()
+
+        input_details = self.interpreter.get_input_details()[0]
+        output_details = self.interpreter.get_output_details()[0]
+        signature = input_details.get("shape_signature", input_details["shape"])
+        if input_shape is not None and any(dim == -1 for dim in signature):
+            self.interpreter.resize_tensor_input(input_details["index"],
+                                                 [1 if dim is None else dim for dim in input_shape])
+            self.interpreter.allocate_tensors()
+
+        self.name = "tflite"
+        self.input_index = input_details["index"]
+        self.input_dtype = input_details["dtype"]
+        self.input_quantization = input_details["quantization"]
+
+        self.output_index = output_details["index"]
+        self.output_quantization = output_details["quantization"]
+        self._bind_tensors()
+
+    def _bind_tensors(self):
+        # Preallocated buffers: callers may fill input_buffer in place
+        self.input_shape = tuple(self.interpreter.get_input_details()[0]["shape"])
+        self.output_tensor = self.interpreter.tensor(self.output_index)
+        self.input_buffer = np.zeros(self.input_shape, dtype=self.input_dtype)
+        self.output_buffer = np.zeros(self.interpreter.get_output_details()[0]["shape"], dtype=np.float32)
+
+    def resize_input(self, input_shape):
+        '''
+        Change the input shape and reallocate tensors: the batch size, or
+        the image size for models with a dynamic input size, like MoveNet.
+        input_buffer and output_buffer are replaced, so refetch them
+        afterwards.
+        '''
+        self.interpreter.resize_tensor_input(self.input_index, list(input_shape))
+        self.interpreter.allocate_tensors()
+        self._bind_tensors()
+
+    def predict(self, batch):
+        '''
+        Run inference on a batch and return the (dequantized) first output.
+        The returned array is reused by the next call; copy it to keep it.
+        '''
+        if batch is not self.input_buffer:
+            if batch.dtype != self.input_dtype and np.issubdtype(self.input_dtype, np.integer):
+                # Float input to a quantized model: quantize on the way in
+                scale, zero_point = self.input_quantization
+                np.copyto(self.input_buffer, np.round(batch / scale + zero_point), casting="unsafe")
+            else:
+                np.copyto(self.input_buffer, batch, casting="unsafe")
+
+        self.interpreter.set_tensor(self.input_index, self.input_buffer)
+        self.interpreter.invoke()
+
+        # tensor() returns a view into the interpreter; don't hold it past this call
+        np.copyto(self.output_buffer, self.output_tensor(), casting="unsafe")
+        scale, zero_point = self.output_quantization
+        if scale:
+            self.output_buffer -= zero_point
+            self.output_buffer *= scale
+        return self.output_buffer
+
+def warm_up(engine, runs=1):
+    '''
+    Run dummy inferences so the first real frame doesn't pay for lazy
+    initialization (XNNPACK packing weights, TF tracing the graph).
+    '''
+    for _ in range(runs):
+        engine.predict(engine.input_buffer)
+
+def set_batch_size(engine, size):
+    '''
+    Resize the engine's input to a batch of `size` frames, so several
+    frames cost one model call. Returns False, leaving the engine as it
+    was, if the model can't run that batch (some converted models have
+    the batch of 1 baked into their ops).
+    '''
+    shape = tuple(engine.input_shape)
+    if shape[0] == size:
+        return True
+    try:
+        engine.resize_input((size,) + shape[1:])
+        engine.predict(engine.input_buffer)  # Some models only fail once invoked
+    except Exception as e:  # TFLite raises ValueError/RuntimeError, TensorFlow its own errors
+        print(f"Model can't run a batch of {size} ({e}); running frames one at a time.")
+        engine.resize_input(shape)
+        return False
+    return True
+
+def create_engine(kind, keras_model_path=None, tflite_model_path=None, num_threads=None,
+                  input_shape=(None, 128, 128, 3), **keras_options):
+    '''
+    Build the requested inference engine. A TFLite engine that can't be
+    loaded falls back to Keras when a SavedModel path is available.
+    input_shape applies to Keras, and to TFLite models with a dynamic input.
+    Extra keyword arguments are passed to KerasEngine.
+    '''
+    if kind == "tflite":
+        try:
+            return TFLiteEngine(tflite_model_path, num_threads=num_threads, input_shape=input_shape)
+        except (ImportError, FileNotFoundError, ValueError, RuntimeError) as e:
+            if keras_model_path is None:
+                raise
+            print(f"TFLite engine unavailable ({e}); falling back to Keras.")
+            return KerasEngine(keras_model_path, input_shape=input_shape, **keras_options)
+    elif kind == "keras":
+        return KerasEngine(keras_model_path, input_shape=input_shape, **keras_options)
+    else:
+        raise ValueError("Invalid engine. Use 'tflite' or 'keras'.")
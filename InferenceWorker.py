@@ -0,0 +1,300 @@
+import multiprocessing as mp
+import time
+from multiprocessing import shared_memory
+import numpy as np
+from PoseEstimation import POSE_DTYPE, MAX_PEOPLE
+
+# One record per ring slot. seq ties a result to the frame it was computed
+# from, so a late answer from a worker that was restarted is never taken
+# for the current frame. Mark times are time.monotonic(), which is the
+# same clock in every process on Linux.
+RESULT_DTYPE = np.dtype([
+    ("seq", np.int64),
+    ("center_x", np.float64),   # NaN when no person
+    ("center_y", np.float64),
+    ("box", np.float32, (4,)),  # NaN when no box
+    ("caption", "S64"),
+    ("preprocess", np.float64), # 0 when the stage didn't run (tracked frame)
+    ("inference", np.float64),
+    ("pose_count", np.int8),    # -1 when there are no poses (classify mode)
+    ("poses", POSE_DTYPE, (MAX_PEOPLE,)),
+])
+
+def _attach(name):
+    # Only the parent unlinks the segments. A spawned worker shares the
+    # parent's resource tracker, so on Pythons without track= the duplicate
+    # registration is harmless and must not be undone here.
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+def _worker_main(options, requests, responses):
+    '''Worker process: load the model, then analyze frames as their slots are handed over.'''
+    import PersonFollower as pf
+    from InferenceEngine import warm_up
+
+    try:
+        engine = pf.build_engine(options["localization"], options["engine"],
+                                 options["tflite_model_path"], options["num_threads"])
+        warm_up(engine)
+        analyzer = pf.FrameAnalyzer(engine, options["localization"], options["tracker"], options["detect_interval"])
+    except Exception as e:
+        responses.send(("error", f"failed to load model: {e}"))
+        return
+    responses.send(("ready",))
+
+    segments = []
+    frames = results = None
+    while True:
+        message = requests.recv()
+        if message is None:
+            break
+        if message[0] == "configure":
+            try:
+                analyzer.configure(**message[1])
+            except Exception as e:
+                responses.send(("error", f"configure failed: {e}"))
+            continue
+        if message[0] == "ring":
+            _, frames_name, results_name, shape, slots = message
+            frames = results = None  # Views must go before their segment can close
+            for segment in segments:
+                segment.close()
+            try:
+                segments = [_attach(frames_name), _attach(results_name)]
+            except FileNotFoundError:
+                segments = []  # Already replaced by the parent; a newer ring message follows
+                continue
+            frames = np.ndarray((slots,) + shape, dtype=np.uint8, buffer=segments[0].buf)
+            results = np.ndarray(slots, dtype=RESULT_DTYPE, buffer=segments[1].buf)
+            continue
+
+        _, slot, seq = message
+        marks = {}
+        try:
+            center_x, center_y, box, caption, poses = analyzer.analyze(frames[slot], marks)
+        except Exception as e:
+            responses.send(("error", f"analysis failed: {e}"))
+            continue
+        _write_result(results, slot, seq, center_x, center_y, box, caption, poses, marks)
+        responses.send(("done", slot, seq))
+
+    del frames, results
+    for segment in segments:
+        segment.close()
+
+def _write_result(results, slot, seq, center_x, center_y, box, caption, poses, marks):
+    result = results[slot]
+    result["center_x"] = np.nan if center_x is None else center_x
+    result["center_y"] = np.nan if center_y is None else center_y
+    result["box"] = np.nan if box is None else box
+    result["caption"] = (caption or "").encode()[:64]
+    result["preprocess"] = marks.get("preprocess", 0.0)
+    result["inference"] = marks.get("inference", 0.0)
+    result["pose_count"] = -1 if poses is None else min(len(poses), MAX_PEOPLE)
+    if poses is not None:
+        result["poses"][:result["pose_count"]] = poses[:MAX_PEOPLE]
+    result["seq"] = seq  # Last, once the rest of the record is in place
+
+class InferenceWorker:
+    '''
+    Runs FrameAnalyzer in a separate process so preprocessing, inference
+    and tracking don't compete for the GIL with servo control and the GUI.
+
+    Frames go through a ring of shared-memory slots sized to the current
+    frame: process() copies the frame into the next slot and sends only
+    (slot, seq) over a pipe. The worker writes its answer into the
+    matching result slot, so pixels are never pickled.
+
+    The worker is supervised from the calling thread. If it dies, or
+    doesn't answer within `timeout`, it's killed and restarted (with
+    exponential backoff if it keeps failing), and frames are skipped
+    until the new one has loaded its model.
+    '''
+
+    def __init__(self, options, slots=2, timeout=2.0, max_backoff=30.0):
+        self.options = options  # Keyword arguments for build_engine/FrameAnalyzer
+        self.slots = slots
+        self.timeout = timeout
+        self.max_backoff = max_backoff
+        self.context = mp.get_context("spawn")  # Never fork a process with camera/Qt threads
+
+        self.child = None
+        self.requests = None
+        self.responses = None
+        self.ready = False
+        self.backoff = 1.0
+        self.next_start = 0.0
+
+        self.shape = None
+        self.segments = []
+        self.frames = None
+        self.results = None
+        self.next_slot = 0
+
+        self.restarts = 0
+        self.timeouts = 0
+        self.errors = 0
+        self.config = {}  # FrameAnalyzer.configure() settings, replayed after a restart
+
+    def start(self):
+        '''Start the worker process. It loads the model while the caller carries on.'''
+        self._close_pipes()  # A previous worker's, if it was never stopped
+        # Pipe(duplex=False) returns (receiving end, sending end)
+        child_requests, self.requests = self.context.Pipe(duplex=False)
+        self.responses, child_responses = self.context.Pipe(duplex=False)
+        self.child = self.context.Process(target=_worker_main, name="inference",
+                                            args=(self.options, child_requests, child_responses), daemon=True)
+        self.child.start()
+        child_requests.close()
+        child_responses.close()
+        self.ready = False
+        if self.config:
+            self.requests.send(("configure", self.config))
+        if self.shape is not None:
+            self._send_ring()
+
+    def stop(self):
+        if self.child is not None:
+            try:
+                self.requests.send(None)
+            except (BrokenPipeError, OSError):
+                pass
+            self.child.join(timeout=2.0)
+            if self.child.is_alive():
+                self.child.kill()
+            self.child = None
+            self.ready = False
+        self._close_pipes()
+        self._free_ring()
+
+    def _close_pipes(self):
+        for connection in (self.requests, self.responses):
+            if connection is not None:
+                connection.close()
+        self.requests = self.responses = None
+
+    def restart(self):
+        '''Kill the worker and start a new one, no sooner than the backoff allows.'''
+        if self.child is not None:
+            self.child.kill()
+            self.child.join(timeout=2.0)
+            self.child = None
+            self.ready = False
+        self._close_pipes()
+        now = time.monotonic()
+        if now < self.next_start:
+            return
+        print(f"Restarting inference worker (restart {self.restarts + 1})")
+        self.restarts += 1
+        self.next_start = now + self.backoff
+        self.backoff = min(self.max_backoff, self.backoff * 2)
+        self.start()
+
+    def configure(self, **config):
+        '''Pass FrameAnalyzer.configure() settings to the worker; applied before the next frame.'''
+        self.config = {**self.config, **config}
+        if self.child is not None:
+            try:
+                self.requests.send(("configure", config))
+            except (BrokenPipeError, OSError):
+                pass  # Sent again on restart
+
+    def get_stats(self):
+        return {"alive": self.child is not None and self.child.is_alive(), "ready": self.ready,
+                "restarts": self.restarts, "timeouts": self.timeouts, "errors": self.errors}
+
+    def _allocate_ring(self, shape):
+        self._free_ring()
+        self.shape = shape
+        frame_bytes = int(np.prod(shape))
+        self.segments = [shared_memory.SharedMemory(create=True, size=self.slots * frame_bytes),
+                         shared_memory.SharedMemory(create=True, size=self.slots * RESULT_DTYPE.itemsize)]
+        self.frames = np.ndarray((self.slots,) + shape, dtype=np.uint8, buffer=self.segments[0].buf)
+        self.results = np.ndarray(self.slots, dtype=RESULT_DTYPE, buffer=self.segments[1].buf)
+        self.results["seq"] = -1
+        self._send_ring()
+
+    def _send_ring(self):
+        if self.child is not None:
+            self.requests.send(("ring", self.segments[0].name, self.segments[1].name, self.shape, self.slots))
+
+    def _free_ring(self):
+        self.frames = self.results = None
+        for segment in self.segments:
+            segment.close()
+            segment.unlink()
+        self.segments = []
+
+    def _receive(self, timeout):
+        '''Next message from the worker, or None on timeout. Raises EOFError if it died.'''
+        deadline = time.monotonic() + timeout
+        while True:
+            if self.responses.poll(min(0.05, max(0.0, deadline - time.monotonic()))):
+                message = self.responses.recv()
+                if message[0] == "error":
+                    self.errors += 1
+                    print(f"Inference worker error: {message[1]}")
+                return message
+            if not self.child.is_alive():
+                raise EOFError("inference worker exited")
+            if time.monotonic() >= deadline:
+                return None
+
+    def process(self, frame, seq, marks=None):
+        '''
+        Analyze one frame in the worker. Returns FrameAnalyzer.analyze()'s
+        (center_x, center_y, box, caption, poses), or None if the frame was skipped
+        because the worker is starting, restarting or too slow.
+        '''
+        if self.child is None or not self.child.is_alive():
+            self.restart()
+            return None
+
+        try:
+            if not self.ready:
+                message = self._receive(0.1)
+                if message is None:
+                    return None  # Still loading the model
+                if message[0] != "ready":
+                    self.restart()  # Failed to load; try again after the backoff
+                    return None
+                self.ready = True
+                self.backoff = 1.0
+
+            if frame.shape != self.shape:
+                self._allocate_ring(frame.shape)
+            slot = self.next_slot
+            self.next_slot = (slot + 1) % self.slots
+            np.copyto(self.frames[slot], frame)
+            self.requests.send(("frame", slot, seq))
+
+            while True:
+                message = self._receive(self.timeout)
+                if message is None:
+                    self.timeouts += 1
+                    self.restart()
+                    return None
+                if message[0] == "done" and message[1:] == (slot, seq):
+                    break
+                if message[0] == "error":
+                    return None
+        except (EOFError, BrokenPipeError, OSError):
+            self.restart()
+            return None
+
+        result = self.results[slot]
+        if result["seq"] != seq:
+            return None
+        if marks is not None:
+            for name in ("preprocess", "inference"):
+                if result[name]:
+                    marks[name] = float(result[name])
+        center_x, center_y = float(result["center_x"]), float(result["center_y"])
+        box = None if np.isnan(result["box"][0]) else result["box"].copy()
+        caption = result["caption"].decode() or None
+        poses = None if result["pose_count"] < 0 else result["poses"][:result["pose_count"]].copy()
+        if np.isnan(center_x):
+            return None, None, box, caption, poses
+        return int(center_x), int(center_y), box, caption, poses
@@ -0,0 +1,160 @@
+import contextlib
+import threading
+import time
+import numpy as np
+
+# Marks a frame collects on its way through the pipeline, in order. Each
+# stage's latency is the time from the previous mark present to its own.
+# "actuate" is when the frame's pan/tilt command is issued, not when it
+# reaches the servo: with coalesced writes it is only staged until the
+# next actuation flush, and in predictive mode it only updates the
+# filter that control_step() follows. Add up to a control period (20 ms
+# at 50 Hz) plus the I2C write for glass-to-servo.
+FRAME_MARKS = ("capture", "read", "dequeue", "preprocess", "inference", "postprocess", "actuate")
+
+# Stage names reported for each mark (the first mark starts the clock)
+STAGE_NAMES = {
+    "read": "capture",
+    "dequeue": "queue",
+    "preprocess": "preprocess",
+    "inference": "inference",
+    "postprocess": "postprocess",
+    "actuate": "actuate",
+}
+
+class LatencyHistogram:
+    '''
+    Rolling window of latency samples in a preallocated ring. Recording is
+    a single array store, so it's cheap enough to leave on; percentiles
+    are only computed when someone asks for them.
+    '''
+
+    def __init__(self, window=1024):
+        self.samples = np.zeros(window, dtype=np.float64)
+        self.count = 0
+
+    def record(self, value):
+        self.samples[self.count % len(self.samples)] = value
+        self.count += 1
+
+    def summary(self, last=None):
+        '''
+        Return {"p50", "p95", "p99", "max", "count"} in the recorded unit,
+        or None if empty. `last` limits it to the most recent samples.
+        '''
+        n = min(self.count, len(self.samples))
+        if last is not None:
+            n = min(n, last)
+        if n == 0:
+            return None
+        if n == len(self.samples):
+            window = self.samples
+        else:
+            # The n newest samples, which may wrap around the end of the ring
+            window = self.samples[(self.count - n + np.arange(n)) % len(self.samples)]
+        p50, p95, p99 = np.percentile(window, (50, 95, 99))
+        return {"p50": float(p50), "p95": float(p95), "p99": float(p99), "max": float(window.max()), "count": self.count}
+
+class PipelineStats:
+    '''
+    Per-stage and glass-to-command (capture to the pan/tilt command being
+    issued, see FRAME_MARKS) latency histograms in ms, plus the completed
+    frame rate. Fed one finished frame at a time.
+    '''
+
+    def __init__(self, window=1024):
+        self.window = window
+        self.histograms = {name: LatencyHistogram(window) for name in STAGE_NAMES.values()}
+        self.histograms["glass_to_command"] = LatencyHistogram(window)
+        self.completions = np.zeros(64, dtype=np.float64)
+        self.completed = 0
+
+    def record(self, name, value_ms):
+        if name not in self.histograms:
+            self.histograms[name] = LatencyHistogram(self.window)
+        self.histograms[name].record(value_ms)
+
+    def record_frame(self, marks):
+        '''Record one frame's marks ({mark name: time.monotonic()}).'''
+        previous = None
+        for mark in FRAME_MARKS:
+            timestamp = marks.get(mark)
+            if timestamp is None:
+                continue  # e.g. tracked frames skip preprocess/inference
+            if previous is not None:
+                self.histograms[STAGE_NAMES[mark]].record((timestamp - previous) * 1000)
+            previous = timestamp
+
+        if "capture" in marks and "actuate" in marks:
+            self.histograms["glass_to_command"].record((marks["actuate"] - marks["capture"]) * 1000)
+            self.completions[self.completed % len(self.completions)] = marks["actuate"]
+            self.completed += 1
+
+    def fps(self):
+        '''Completed frames per second over the recent window.'''
+        n = min(self.completed, len(self.completions))
+        if n < 2:
+            return 0.0
+        recent = self.completions[:n]
+        span = recent.max() - recent.min()
+        return (n - 1) / span if span > 0 else 0.0
+
+    def snapshot(self):
+        '''Return {"fps": ..., "frames": ..., "stages": {name: summary}}.'''
+        stages = {}
+        for name, histogram in self.histograms.items():
+            summary = histogram.summary()
+            if summary is not None:
+                stages[name] = summary
+        return {"fps": self.fps(), "frames": self.completed, "stages": stages}
+
+class StartupProfile:
+    '''
+    Wall-clock timeline of startup phases, relative to `start` (a
+    time.perf_counter() value, ideally taken before the heavy imports).
+    Phases can run on different threads, e.g. model loading alongside
+    hardware init.
+    '''
+
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self.phases = []  # (name, began, ended, thread name)
+        self.lock = threading.Lock()
+
+    def record(self, name, began, ended):
+        with self.lock:
+            self.phases.append((name, began, ended, threading.current_thread().name))
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, began, time.perf_counter())
+
+    def format(self):
+        '''Render the phases as a fixed-width table in start order, times in ms.'''
+        with self.lock:
+            phases = sorted(self.phases, key=lambda phase: phase[1])
+        lines = [f"{'phase':<20}{'start':>9}{'took':>9}  thread"]
+        for name, began, ended, thread in phases:
+            lines.append(f"{name:<20}{(began - self.start) * 1000:>9.1f}{(ended - began) * 1000:>9.1f}  {thread}")
+        if phases:
+            lines.append(f"{'ready':<20}{(max(phase[2] for phase in phases) - self.start) * 1000:>9.1f}")
+        return "\n".join(lines)
+
+def format_stats(snapshot):
+    '''Render a stats snapshot as a small fixed-width text table.'''
+    lines = [f"{snapshot['fps']:.1f} FPS  ({snapshot['frames']} frames)",
+             f"{'stage':<12}{'p50':>7}{'p95':>7}{'p99':>7}"]
+    for name, summary in snapshot["stages"].items():
+        lines.append(f"{name:<12}{summary['p50']:>7.1f}{summary['p95']:>7.1f}{summary['p99']:>7.1f}")
+    if "motion_gate" in snapshot:
+        gate = snapshot["motion_gate"]
+        lines.append(f"gate skipped {gate['skip_rate']:.0%} of {gate['checked']} frames")
+    return "\n".join(lines)
+
+def mark(marks, name):
+    '''Timestamp `name` in a frame's marks dict.'''
+    marks[name] = time.monotonic()
@@ -1,4 +1,8 @@
-import pygame
+import threading
+import time
+
+# pygame is imported by the methods that talk to the device, so the
+# button and axis maps (and a disabled JoystickService) don't load it
 
 XBOX_BUTTONS = {
     "A": 0,
@@ -24,6 +28,8 @@ XBOX_AXES = {
 
 class Joystick:
     def __init__(self, disabled: bool = False):
+        import pygame
+
         if not pygame.joystick.get_init():
             pygame.joystick.init()
 
@@ -59,9 +65,11 @@ class Joystick:
             # return lt mapped to [-1, 0]
             lt = (lt + 1) / 2
             return -lt
-
+        return 0.0
 
     def wait_for_connection(self):
+        import pygame
+
         while not self.connected:
             pygame.event.pump()
             print("No joystick connected. Waiting...", end="\r", flush=True)
@@ -91,4 +99,208 @@ class Joystick:
     
     def update_connection_status(self):
         # Check if the joystick is still connected
-        self.connected = pygame.joystick.get_count() > 0
\ No newline at end of file
+        import pygame
+
+        self.connected = pygame.joystick.get_count() > 0
+
+def shape_axis(value: float, deadzone: float = 0.05, expo: float = 0.0) -> float:
+    '''
+    Apply a deadzone and expo curve to a stick value in [-1, 1]. Values
+    inside the deadzone read 0 and the rest is rescaled so the output
+    still reaches +/-1. expo blends in a cubic for finer control near
+    center (0 = linear, 1 = pure cubic).
+    '''
+    magnitude = abs(value)
+    if magnitude <= deadzone:
+        return 0.0
+    x = min(1.0, (magnitude - deadzone) / (1.0 - deadzone))
+    x = (1.0 - expo) * x + expo * x ** 3
+    return x if value > 0 else -x
+
+class JoystickState:
+    '''
+    Immutable snapshot of the controller. Raw axis values and buttons by
+    name, plus the time.monotonic() of the event batch it was built from.
+    '''
+    __slots__ = ("axes", "buttons", "timestamp", "connected")
+
+    def __init__(self, axes, buttons, timestamp, connected):
+        self.axes = axes
+        self.buttons = buttons
+        self.timestamp = timestamp
+        self.connected = connected
+
+def _idle_axes():
+    # Sticks centered, triggers released (they rest at -1)
+    axes = {name: 0.0 for name in XBOX_AXES}
+    axes["LT"] = axes["RT"] = -1.0
+    return axes
+
+def _idle_buttons():
+    return {name: 0 for name in XBOX_BUTTONS}
+
+class JoystickService:
+    '''
+    Reads the controller on its own thread, driven by pygame events, so
+    callers never pump the event queue or query the device. Each batch of
+    events produces a new JoystickState that replaces `state` in a single
+    reference swap; readers grab `state` once and get a consistent view
+    without locking.
+
+    Plugging and unplugging are handled as device events. While no
+    controller is connected the state is idle, so throttle reads 0.
+
+    It fails safe: if the thread dies the snapshot is reset to idle, and
+    the sticks and triggers read neutral whenever the thread isn't
+    running or the snapshot is older than max_age. The thread refreshes
+    the snapshot every poll_timeout even without input, so a held
+    trigger doesn't go stale.
+
+    `manual_override` is set while the operator has taken over from the
+    person follower, toggled with override_button. The control loop checks
+    it every tick.
+
+    pygame.init() (or at least the display and joystick modules) must have
+    been called before start().
+    '''
+
+    def __init__(self, disabled: bool = False, deadzone: float = 0.05, expo: float = 0.3,
+                 trigger_deadzone: float = 0.01, override_button: str = "B", poll_timeout: float = 0.1,
+                 max_age: float = 0.5):
+        if override_button not in XBOX_BUTTONS:
+            raise ValueError(f"Invalid button name: {override_button}")
+        self.disabled = disabled
+        self.deadzone = deadzone
+        self.expo = expo
+        self.trigger_deadzone = trigger_deadzone
+        self.override_button = override_button
+        self.poll_timeout = poll_timeout
+        self.max_age = max_age  # Seconds before a snapshot counts as stale
+
+        self.state = JoystickState(_idle_axes(), _idle_buttons(), time.monotonic(), connected=disabled)
+        self.manual_override = threading.Event()
+        self.device = None
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        if self.disabled:
+            return
+        import pygame
+
+        if not pygame.joystick.get_init():
+            pygame.joystick.init()
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name="joystick", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.running = False
+        if self.thread is not None:
+            self.thread.join(timeout=1.0)
+
+    def _run(self):
+        try:
+            self._read_events()
+        except Exception as e:
+            print(f"Joystick thread failed: {e}")
+            self.state = JoystickState(_idle_axes(), _idle_buttons(), time.monotonic(), connected=False)
+
+    def _read_events(self):
+        import pygame
+
+        # pygame posts JOYDEVICEADDED for controllers already plugged in,
+        # so startup and hot-plug go through the same path
+        while self.running:
+            event = pygame.event.wait(int(self.poll_timeout * 1000))
+            if event.type == pygame.NOEVENT:
+                state = self.state  # No input; just show the thread is alive
+                self.state = JoystickState(state.axes, state.buttons, time.monotonic(), state.connected)
+                continue
+            axes, buttons = dict(self.state.axes), dict(self.state.buttons)
+            connected = self.state.connected
+            for event in [event] + pygame.event.get():
+                if event.type == pygame.JOYDEVICEADDED and self.device is None:
+                    try:
+                        self.device = pygame.joystick.Joystick(event.device_index)
+                        self.device.init()
+                    except pygame.error as e:
+                        print(f"Failed to initialize joystick: {e}")
+                        self.device = None
+                        continue
+                    connected = True
+                    axes, buttons = _idle_axes(), _idle_buttons()
+                elif event.type == pygame.JOYDEVICEREMOVED and self.device is not None \
+                        and event.instance_id == self.device.get_instance_id():
+                    self.device = None
+                    connected = False
+                    axes, buttons = _idle_axes(), _idle_buttons()
+                elif event.type == pygame.JOYAXISMOTION and event.axis in _AXIS_NAMES:
+                    axes[_AXIS_NAMES[event.axis]] = event.value
+                elif event.type in (pygame.JOYBUTTONDOWN, pygame.JOYBUTTONUP) and event.button in _BUTTON_NAMES:
+                    name = _BUTTON_NAMES[event.button]
+                    buttons[name] = int(event.type == pygame.JOYBUTTONDOWN)
+                    if name == self.override_button and event.type == pygame.JOYBUTTONDOWN:
+                        self._toggle_override()
+            self.state = JoystickState(axes, buttons, time.monotonic(), connected)
+
+    def _toggle_override(self):
+        if self.manual_override.is_set():
+            self.manual_override.clear()
+        else:
+            self.manual_override.set()
+
+    def age(self) -> float:
+        '''Seconds since the snapshot was last refreshed.'''
+        return time.monotonic() - self.state.timestamp
+
+    def _live_state(self):
+        # The snapshot, or an idle one if the thread has died or stalled
+        state = self.state
+        if self.thread is None or not self.thread.is_alive() \
+                or time.monotonic() - state.timestamp > self.max_age:
+            return JoystickState(_idle_axes(), _idle_buttons(), state.timestamp, state.connected)
+        return state
+
+    # Same reading API as Joystick, served from the snapshot
+
+    def read_throttle(self) -> float:
+        state = self._live_state()
+        rt = (state.axes["RT"] + 1) / 2
+        lt = (state.axes["LT"] + 1) / 2
+        if rt > self.trigger_deadzone:
+            return rt
+        elif lt > self.trigger_deadzone:
+            return -lt
+        return 0.0
+
+    def wait_for_connection(self, timeout: float = None) -> bool:
+        '''Block until a controller is connected (or timeout). Returns whether one is.'''
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while not self.state.connected:
+            if deadline is not None and time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        return True
+
+    def is_connected(self):
+        return self.state.connected
+
+    def get_axis(self, axis_name: str, limit_perc: float = 100):
+        if axis_name not in XBOX_AXES:
+            raise ValueError(f"Invalid axis name: {axis_name}")
+        value = self._live_state().axes[axis_name]
+        if axis_name not in ("LT", "RT"):
+            value = shape_axis(value, self.deadzone, self.expo)
+        return value * (limit_perc / 100)
+
+    def get_button(self, button_name: str):
+        if button_name not in XBOX_BUTTONS:
+            raise ValueError(f"Invalid button name: {button_name}")
+        return self.state.buttons[button_name]
+
+    def update_connection_status(self):
+        pass  # Tracked from device events
+
+_AXIS_NAMES = {index: name for name, index in XBOX_AXES.items()}
+_BUTTON_NAMES = {index: name for name, index in XBOX_BUTTONS.items()}
@@ -1,9 +1,33 @@
 import logging
 from logging.handlers import RotatingFileHandler
 from datetime import datetime
+import atexit
+import csv as csvlib
+import io
+import os
+import queue
+import sys
+import threading
+import time
+
+LEVELS = ("info", "warning", "error", "debug")
 
 class Logger:
-    def __init__(self, log_file="app.log", max_size=10 * 1024 * 1024, backup_count=1):
+    def __init__(self, log_file="app.log", max_size=10 * 1024 * 1024, backup_count=1,
+                 queued=False, flush_interval=1.0, flush_bytes=64 * 1024, console_rate=5.0):
+        self.log_file = log_file
+        self.max_size = max_size
+        self.backup_count = backup_count
+        self.queued = queued
+
+        if queued:
+            # log() and csv() only enqueue; a background writer formats,
+            # batches and rotates, so callers never touch the disk.
+            self.writer = _BatchWriter(log_file, max_size, backup_count,
+                                       flush_interval, flush_bytes, console_rate)
+            atexit.register(self.close)
+            return
+
         self.logger = logging.getLogger("VehicleLogger")
         self.logger.setLevel(logging.INFO)
 
@@ -21,6 +45,12 @@ class Logger:
         self.logger.addHandler(console_handler)
 
     def log(self, level, subject, message):
+        if self.queued:
+            if level not in LEVELS:
+                raise ValueError("Invalid log level. Use 'info', 'warning', 'error', or 'debug'.")
+            self.writer.queue.put(("log", time.time(), level, subject, message))
+            return
+
         extra = {"subject": subject}
         if level == "info":
             self.logger.info(message, extra=extra)
@@ -38,6 +68,11 @@ class Logger:
         import os
         from datetime import datetime
 
+        if self.queued:
+            row = (message['throttle'], message['front_s'], message['rear_s'], message['pan'], message['tilt'])
+            self.writer.queue.put(("csv", time.time(), csv_file, subject, row, max_size))
+            return
+
         timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
 
         # Check if the file exceeds the max size
@@ -48,6 +83,131 @@ class Logger:
 
         with open(csv_file, mode='a', newline='') as file:
             writer = csv.writer(file)
-            
+
             writer.writerow([timestamp, subject, message['throttle'], message['front_s'], message['rear_s'], message['pan'], message['tilt']])
-            file.flush()
\ No newline at end of file
+            file.flush()
+
+    def close(self):
+        '''Flush and stop the background writer (queued mode only).'''
+        if self.queued:
+            self.writer.close()
+
+class _BatchWriter:
+    '''
+    Background thread behind a queued Logger. Drains everything that's
+    waiting, appends it to in-memory per-file buffers and writes a file
+    once it has flush_bytes buffered or flush_interval has passed.
+    Console output is limited to console_rate lines per second.
+    '''
+
+    def __init__(self, log_file, max_size, backup_count, flush_interval, flush_bytes, console_rate):
+        self.log_file = log_file
+        self.max_size = max_size
+        self.backup_count = backup_count
+        self.flush_interval = flush_interval
+        self.flush_bytes = flush_bytes
+
+        self.queue = queue.SimpleQueue()
+        self.pending = {}      # path -> list of formatted chunks
+        self.pending_bytes = 0
+        self.csv_limits = {}   # csv path -> max_size
+        self.last_flush = time.monotonic()
+
+        # Token bucket for console output
+        self.console_rate = console_rate
+        self.console_tokens = console_rate
+        self.console_refill = time.monotonic()
+        self.console_suppressed = 0
+
+        self.thread = threading.Thread(target=self._run, name="logger", daemon=True)
+        self.thread.start()
+
+    def close(self):
+        if self.thread.is_alive():
+            self.queue.put(None)
+            self.thread.join(timeout=5.0)
+
+    def _run(self):
+        running = True
+        while running:
+            batch = []
+            try:
+                batch.append(self.queue.get(timeout=self.flush_interval))
+                # Take everything else already queued in one go
+                while True:
+                    batch.append(self.queue.get_nowait())
+            except queue.Empty:
+                pass
+
+            for record in batch:
+                if record is None:
+                    running = False
+                elif record[0] == "log":
+                    self._format_log(*record[1:])
+                else:
+                    self._format_csv(*record[1:])
+
+            if (not running or self.pending_bytes >= self.flush_bytes
+                    or time.monotonic() - self.last_flush >= self.flush_interval):
+                self._flush()
+
+    def _buffer(self, path, text):
+        self.pending.setdefault(path, []).append(text)
+        self.pending_bytes += len(text)
+
+    def _format_log(self, created, level, subject, message):
+        if level == "debug":
+            return  # Same INFO threshold as the synchronous logger
+        asctime = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(created)) + f",{int(created % 1 * 1000):03d}"
+        line = f"{asctime} - {level.upper()} - {subject} - {message}\n"
+        self._buffer(self.log_file, line)
+        self._console(line)
+
+    def _format_csv(self, created, csv_file, subject, row, max_size):
+        timestamp = datetime.fromtimestamp(created).strftime('%Y-%m-%d %H:%M:%S')
+        text = io.StringIO()
+        csvlib.writer(text).writerow([timestamp, subject, *row])
+        self.csv_limits[csv_file] = max_size
+        self._buffer(csv_file, text.getvalue())
+
+    def _console(self, line):
+        now = time.monotonic()
+        self.console_tokens = min(self.console_rate, self.console_tokens + (now - self.console_refill) * self.console_rate)
+        self.console_refill = now
+        if self.console_tokens < 1:
+            self.console_suppressed += 1
+            return
+        self.console_tokens -= 1
+        if self.console_suppressed:
+            sys.stderr.write(f"({self.console_suppressed} log lines suppressed)\n")
+            self.console_suppressed = 0
+        sys.stderr.write(line)
+
+    def _flush(self):
+        for path, chunks in self.pending.items():
+            data = "".join(chunks)
+            try:
+                self._rotate(path, len(data))
+                with open(path, mode='a', newline='') as file:
+                    file.write(data)
+            except OSError as e:
+                sys.stderr.write(f"Logger failed to write {path}: {e}\n")
+        self.pending = {}
+        self.pending_bytes = 0
+        self.last_flush = time.monotonic()
+
+    def _rotate(self, path, incoming):
+        if not os.path.exists(path):
+            return
+        size = os.path.getsize(path)
+        if path in self.csv_limits:
+            # CSVs rotate by renaming with a timestamp, like Logger.csv
+            if size > self.csv_limits[path]:
+                base, ext = os.path.splitext(path)
+                os.rename(path, f"{base}_{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}{ext}")
+        elif self.backup_count > 0 and size + incoming > self.max_size:
+            # The log file rotates like RotatingFileHandler: app.log -> app.log.1 ...
+            for i in range(self.backup_count - 1, 0, -1):
+                if os.path.exists(f"{path}.{i}"):
+                    os.replace(f"{path}.{i}", f"{path}.{i + 1}")
+            os.replace(path, f"{path}.1")
@@ -0,0 +1,75 @@
+import time
+import cv2
+import numpy as np
+
+class MotionGate:
+    '''
+    Decides whether a frame is worth running the model on. The frame is
+    shrunk to a small grayscale thumbnail and compared with the thumbnail
+    of the last frame that was analyzed, block by block: if no block's
+    mean difference passes `block_threshold`, the scene hasn't moved and
+    the previous result still stands.
+
+    Comparing against the last analyzed frame (not the previous one)
+    means slow changes add up until they open the gate. The model is also
+    run at least every `refresh_interval` seconds, so lighting drift or
+    a person standing very still can't keep a stale answer alive.
+
+    With several cameras, should_run() takes one frame from each and
+    opens the gate when any of them moved.
+    '''
+
+    def __init__(self, size=(64, 48), block=8, block_threshold=6.0, refresh_interval=1.0, cameras=1):
+        width, height = size
+        if width % block or height % block:
+            raise ValueError("Thumbnail size must be a multiple of the block size.")
+        self.size = size
+        self.block = block
+        self.block_threshold = block_threshold  # Mean abs difference (0-255) that counts as motion
+        self.refresh_interval = refresh_interval
+
+        self.small = np.empty((height, width, 3), dtype=np.uint8)
+        self.gray = np.empty((cameras, height, width), dtype=np.uint8)
+        self.reference = np.empty((cameras, height, width), dtype=np.uint8)
+        self.diff = np.empty((height, width), dtype=np.uint8)
+        self.has_reference = False
+        self.last_run = 0.0
+
+        self.checked = 0
+        self.skipped = 0
+        self.score = 0.0  # Largest block difference of the last frames checked
+
+    def should_run(self, *frames, now=None):
+        '''
+        True if the model should run on these frames (one per camera). They
+        then become the reference the next ones are compared against.
+        '''
+        now = time.monotonic() if now is None else now
+        for frame, gray in zip(frames, self.gray):
+            cv2.resize(frame, self.size, dst=self.small, interpolation=cv2.INTER_AREA)
+            cv2.cvtColor(self.small, cv2.COLOR_BGR2GRAY, dst=gray)
+        self.checked += 1
+
+        if self.has_reference:
+            self.score = 0.0
+            height, width = self.diff.shape
+            for gray, reference in zip(self.gray, self.reference):
+                cv2.absdiff(gray, reference, dst=self.diff)
+                blocks = self.diff.reshape(height // self.block, self.block, width // self.block, self.block)
+                self.score = max(self.score, float(blocks.mean(axis=(1, 3)).max()))
+            if self.score < self.block_threshold and now - self.last_run < self.refresh_interval:
+                self.skipped += 1
+                return False
+
+        np.copyto(self.reference, self.gray)
+        self.has_reference = True
+        self.last_run = now
+        return True
+
+    def reset(self):
+        '''Run the model on the next frame regardless.'''
+        self.has_reference = False
+
+    def get_stats(self):
+        return {"checked": self.checked, "skipped": self.skipped,
+                "skip_rate": self.skipped / self.checked if self.checked else 0.0, "score": self.score}
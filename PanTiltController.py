@@ -0,0 +1,122 @@
+import threading
+import time
+
+class AlphaBetaFilter:
+    '''
+    Position and velocity estimate for one axis from measurements that
+    arrive at irregular times. alpha weights position corrections, beta
+    velocity corrections.
+    '''
+
+    def __init__(self, alpha=0.5, beta=0.1):
+        self.alpha = alpha
+        self.beta = beta
+        self.reset()
+
+    def reset(self):
+        self.position = None
+        self.velocity = 0.0
+        self.timestamp = None
+
+    def update(self, measurement, timestamp):
+        if self.position is None:
+            self.position = measurement
+            self.timestamp = timestamp
+            return
+        dt = timestamp - self.timestamp
+        if dt <= 0:
+            return
+        predicted = self.position + self.velocity * dt
+        residual = measurement - predicted
+        self.position = predicted + self.alpha * residual
+        self.velocity += self.beta * residual / dt
+        self.timestamp = timestamp
+
+    def predict(self, timestamp):
+        return self.position + self.velocity * (timestamp - self.timestamp)
+
+class PID:
+    def __init__(self, kp, ki=0.0, kd=0.0, integral_limit=10.0):
+        self.kp = kp
+        self.ki = ki
+        self.kd = kd
+        self.integral_limit = integral_limit
+        self.reset()
+
+    def reset(self):
+        self.integral = 0.0
+        self.previous_error = None
+
+    def step(self, error, dt):
+        self.integral = max(-self.integral_limit, min(self.integral_limit, self.integral + error * dt))
+        derivative = 0.0 if self.previous_error is None or dt <= 0 else (error - self.previous_error) / dt
+        self.previous_error = error
+        return self.kp * error + self.ki * self.integral + self.kd * derivative
+
+class PredictivePanTilt:
+    '''
+    Pan/tilt controller that runs at the control rate, independent of how
+    often detections arrive.
+
+    Each detection is turned into the servo angle that would have centered
+    the person, using the pan/tilt the camera had when the frame was
+    captured. Those angles are filtered against the frame's capture time,
+    so predicting to "now" already compensates each frame's measured
+    pipeline latency; `lead` adds the servo's own response time on top.
+    A PID then drives the servos toward the predicted angle with a speed
+    limit.
+    '''
+
+    def __init__(self, hfov=60.0, vfov=45.0, kp=8.0, ki=0.0, kd=0.2, max_speed=120.0,
+                 lead=0.05, lost_timeout=1.0, alpha=0.5, beta=0.3):
+        self.hfov = hfov
+        self.vfov = vfov
+        self.max_speed = max_speed  # Degrees per second
+        self.lead = lead
+        self.lost_timeout = lost_timeout
+
+        self.pan_filter = AlphaBetaFilter(alpha, beta)
+        self.tilt_filter = AlphaBetaFilter(alpha, beta)
+        self.pan_pid = PID(kp, ki, kd)
+        self.tilt_pid = PID(kp, ki, kd)
+        self.last_detection = None
+        self.last_step = None
+        self.lock = threading.Lock()
+
+    def update(self, center_x, center_y, frame_width, frame_height, capture_time, pan_at_capture, tilt_at_capture):
+        '''Feed one detection (pixel center) from a frame captured at capture_time.'''
+        if center_x is None or center_y is None:
+            return
+        # Same directions as the bang-bang controller: left/up of center -> increase angle
+        target_pan = pan_at_capture + (frame_width / 2 - center_x) * self.hfov / frame_width
+        target_tilt = tilt_at_capture + (frame_height / 2 - center_y) * self.vfov / frame_height
+        with self.lock:
+            self.pan_filter.update(target_pan, capture_time)
+            self.tilt_filter.update(target_tilt, capture_time)
+            self.last_detection = capture_time
+
+    def step(self, pan_angle, tilt_angle, now=None):
+        '''
+        Return the next (pan, tilt) angles, or None to hold position when
+        no person has been seen for lost_timeout seconds.
+        '''
+        now = time.monotonic() if now is None else now
+        dt = 0.0 if self.last_step is None else now - self.last_step
+        self.last_step = now
+
+        with self.lock:
+            if self.last_detection is None or now - self.last_detection > self.lost_timeout:
+                self.pan_filter.reset()
+                self.tilt_filter.reset()
+                self.pan_pid.reset()
+                self.tilt_pid.reset()
+                self.last_detection = None
+                return None
+            target_pan = self.pan_filter.predict(now + self.lead)
+            target_tilt = self.tilt_filter.predict(now + self.lead)
+
+        max_move = self.max_speed * dt
+        pan_move = max(-max_move, min(max_move, self.pan_pid.step(target_pan - pan_angle, dt) * dt))
+        tilt_move = max(-max_move, min(max_move, self.tilt_pid.step(target_tilt - tilt_angle, dt) * dt))
+        return (max(0, min(180, pan_angle + pan_move)),
+                max(0, min(180, tilt_angle + tilt_move)))
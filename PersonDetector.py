@@ -0,0 +1,224 @@
+import cv2
+import numpy as np
+from Preprocessor import Preprocessor
+from Instrumentation import mark
+from InferenceEngine import set_batch_size
+from PoseEstimation import decode_poses
+
+# OpenCV tracker factories by name. KCF and CSRT live in opencv-contrib
+# (and under cv2.legacy on some 4.x builds); MIL ships with core OpenCV.
+CV_TRACKERS = {
+    "kcf": "TrackerKCF_create",
+    "csrt": "TrackerCSRT_create",
+    "mil": "TrackerMIL_create",
+}
+
+def cv_tracker_factory(kind):
+    '''
+    The constructor of an OpenCV tracker kind ("kcf", "csrt", "mil").
+    Raises RuntimeError if this OpenCV build doesn't have it, so a
+    missing contrib module is caught at startup.
+    '''
+    name = CV_TRACKERS[kind]
+    for module in (cv2, getattr(cv2, "legacy", None)):
+        if module is not None and hasattr(module, name):
+            return getattr(module, name)
+    raise RuntimeError(f"OpenCV build has no {kind.upper()} tracker; install opencv-contrib-python or use 'flow'.")
+
+class MoveNetDetector:
+    '''
+    Finds people with the MoveNet multipose model. Returns pixel boxes
+    (x1, y1, x2, y2) and scores for every person above the threshold; the
+    full poses of the last frame are kept in `poses`. detect_batch() runs
+    several frames (e.g. one per camera) through a single model call.
+    '''
+
+    def __init__(self, engine, score_threshold=0.3, keypoint_threshold=0.3):
+        self.engine = engine
+        self.score_threshold = score_threshold
+        self.keypoint_threshold = keypoint_threshold
+        self.poses = None
+        self.batching = True  # Cleared if the model turns out to need a batch of 1
+        self._build_preprocessors()
+
+    def _build_preprocessors(self):
+        # MoveNet takes raw 0-255 pixels (int32 SavedModel, uint8 TFLite).
+        # One preprocessor per batch slot, each filling its slice of the input.
+        self.preprocessors = [Preprocessor(self.engine.input_shape, dtype=self.engine.input_dtype,
+                                           normalize=False, out=self.engine.input_buffer[i:i + 1])
+                              for i in range(self.engine.input_shape[0])]
+        self.preprocessor = self.preprocessors[0]
+
+    def set_input_size(self, size):
+        '''Run the model at size x size (a multiple of 32). Smaller is faster but misses small people.'''
+        if self.engine.input_shape[1:3] == (size, size):
+            return
+        self.engine.resize_input((self.engine.input_shape[0], size, size, 3))
+        self._build_preprocessors()
+
+    def detect(self, frame, marks=None):
+        self.poses = self.detect_batch([frame], marks)[0]
+        return self.poses["box"], self.poses["score"]
+
+    def detect_batch(self, frames, marks=None):
+        '''Detect people in several frames with one model call. Returns each frame's poses.'''
+        if self.batching and not set_batch_size(self.engine, len(frames)):
+            self.batching = False
+        if not self.batching:
+            set_batch_size(self.engine, 1)
+        # Any resize, even a failed one that resizes back, replaces the input buffer
+        if not np.may_share_memory(self.preprocessors[0].input, self.engine.input_buffer):
+            self._build_preprocessors()
+
+        batch = len(self.preprocessors)
+        poses = []
+        for start in range(0, len(frames), batch):
+            chunk = frames[start:start + batch]
+            for preprocessor, frame in zip(self.preprocessors, chunk):
+                preprocessor(frame)
+            if marks is not None:
+                mark(marks, "preprocess")
+            output = self.engine.predict(self.engine.input_buffer)
+            if marks is not None:
+                mark(marks, "inference")
+            for row, frame in zip(output, chunk):
+                height, width = frame.shape[:2]
+                poses.append(decode_poses(row, width, height, self.score_threshold, self.keypoint_threshold))
+        return poses
+
+    def decode(self, output, width, height):
+        '''Turn one image's model output into pixel boxes and scores above the threshold.'''
+        self.poses = decode_poses(output, width, height, self.score_threshold, self.keypoint_threshold)
+        return self.poses["box"], self.poses["score"]
+
+def draw_detection(frame, box, text, color=(0, 255, 0)):
+    '''Draw a person box and a caption on the frame in place.'''
+    x1, y1, x2, y2 = np.asarray(box).astype(int)
+    cv2.rectangle(frame, (x1, y1), (x2, y2), color, 2)
+    cv2.putText(frame, text, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, color, 2)
+
+def box_iou(box, boxes):
+    '''Intersection-over-union of one box against an (N, 4) array of boxes.'''
+    x1 = np.maximum(box[0], boxes[:, 0])
+    y1 = np.maximum(box[1], boxes[:, 1])
+    x2 = np.minimum(box[2], boxes[:, 2])
+    y2 = np.minimum(box[3], boxes[:, 3])
+    intersection = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area = (box[2] - box[0]) * (box[3] - box[1])
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    return intersection / np.maximum(area + areas - intersection, 1e-6)
+
+class PersonTracker:
+    '''
+    Cheap frame-to-frame box tracker used between detections.
+
+    kind="flow" tracks corner features inside the box with pyramidal
+    Lucas-Kanade and reports the fraction of points that survive a
+    forward-backward check as its confidence. kind="kcf"/"csrt"/"mil"
+    wrap the OpenCV trackers, whose confidence is 1 or 0.
+    '''
+
+    def __init__(self, kind="flow", max_points=50):
+        if kind != "flow" and kind not in CV_TRACKERS:
+            raise ValueError("Invalid tracker. Use 'flow', 'kcf', 'csrt', or 'mil'.")
+        self.kind = kind
+        self.create_cv_tracker = None if kind == "flow" else cv_tracker_factory(kind)
+        self.max_points = max_points
+        self.box = None
+        self.confidence = 0.0
+        self.tracker = None
+        self.previous_gray = None
+        self.points = None
+
+    def init(self, frame, box):
+        self.box = np.asarray(box, dtype=np.float32)
+        self.confidence = 1.0
+        x1, y1, x2, y2 = self.box.astype(int)
+
+        if self.kind != "flow":
+            self.tracker = self.create_cv_tracker()
+            self.tracker.init(frame, (int(x1), int(y1), int(x2 - x1), int(y2 - y1)))
+            return
+
+        self.previous_gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        mask = np.zeros_like(self.previous_gray)
+        mask[max(0, y1):max(0, y2), max(0, x1):max(0, x2)] = 255
+        self.points = cv2.goodFeaturesToTrack(self.previous_gray, self.max_points, 0.01, 5, mask=mask)
+        if self.points is None:
+            self.confidence = 0.0
+
+    def update(self, frame):
+        '''Move the box to the new frame. Returns (box, confidence).'''
+        if self.box is None or self.confidence == 0.0:
+            return None, 0.0
+
+        if self.kind != "flow":
+            ok, (x, y, w, h) = self.tracker.update(frame)
+            self.confidence = 1.0 if ok else 0.0
+            if ok:
+                self.box = np.array([x, y, x + w, y + h], dtype=np.float32)
+            return self.box, self.confidence
+
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if gray.shape != self.previous_gray.shape:
+            # Resolution changed; the box means nothing in the new frame
+            self.confidence = 0.0
+            return None, 0.0
+        points, status, _ = cv2.calcOpticalFlowPyrLK(self.previous_gray, gray, self.points, None)
+        back, back_status, _ = cv2.calcOpticalFlowPyrLK(gray, self.previous_gray, points, None)
+
+        # Keep points that track forward and land back where they started
+        error = np.linalg.norm((back - self.points).reshape(-1, 2), axis=1)
+        good = (status.ravel() == 1) & (back_status.ravel() == 1) & (error < 1.0)
+        self.confidence = float(np.count_nonzero(good)) / len(self.points)
+        if np.count_nonzero(good) < 3:
+            self.confidence = 0.0
+            return None, 0.0
+
+        shift = np.median((points - self.points).reshape(-1, 2)[good], axis=0)
+        self.box = self.box + np.tile(shift, 2)
+        self.points = points[good].reshape(-1, 1, 2)
+        self.previous_gray = gray
+        return self.box, self.confidence
+
+class DetectTrackLocalizer:
+    '''
+    Runs the detector every `detect_interval` frames, or sooner when the
+    tracker loses confidence, and tracks the chosen person in between.
+    '''
+
+    def __init__(self, detector, tracker_kind="flow", detect_interval=10, min_confidence=0.5):
+        self.detector = detector
+        self.tracker = PersonTracker(tracker_kind)
+        self.detect_interval = detect_interval
+        self.min_confidence = min_confidence
+        self.frames_since_detection = detect_interval
+
+    def track(self, frame):
+        '''
+        Follow the person without the detector. Returns (box, confidence,
+        "track"), or None when it's time for a detection.
+        '''
+        if self.frames_since_detection < self.detect_interval:
+            box, confidence = self.tracker.update(frame)
+            if box is not None and confidence >= self.min_confidence:
+                self.frames_since_detection += 1
+                return box, confidence, "track"
+        return None
+
+    def update(self, frame, boxes, scores):
+        '''Take this frame's detections (e.g. from a batch) and pick the person to follow.'''
+        self.frames_since_detection = 1
+        if len(boxes) == 0:
+            self.tracker.box = None
+            return None, 0.0, "detect"
+
+        # Stay on the person we were following if they're still there
+        best = int(np.argmax(scores))
+        if self.tracker.box is not None:
+            overlaps = box_iou(self.tracker.box, boxes)
+            if overlaps.max() > 0.3:
+                best = int(np.argmax(overlaps))
+
+        self.tracker.init(frame, boxes[best])
+        return boxes[best], float(scores[best]), "detect"
@@ -1,142 +1,568 @@
-import tensorflow as tf
 from USBCamera import USBCamera
 from VehicleController import VehicleController
 import cv2
 import warnings
+import queue
 import threading
 import numpy as np
 import os
-import kagglehub
-import tflite_runtime.interpreter as tflite
-import tensorflow_hub as hub
+from contextlib import contextmanager
+from InferenceEngine import create_engine, set_batch_size
+from Preprocessor import Preprocessor
+from PersonDetector import MoveNetDetector, DetectTrackLocalizer, draw_detection
+from PoseEstimation import draw_poses
+from Pipeline import LatestQueue, FramePacket, Stage
+from Instrumentation import PipelineStats, mark
+from PanTiltController import PredictivePanTilt
+from MotionGate import MotionGate
 
 # Suppress FutureWarnings
 warnings.filterwarnings("ignore", category=FutureWarning)
 
+# MobileNetV2 SavedModel and its converted .tflite (see convert_pb_to_tflite.py)
+MODEL_DIR = "/home/jt/Documents/py/crawler/models/mobilenet_v2"
+TFLITE_MODEL_PATH = os.path.join(MODEL_DIR, "model.tflite")
+
+# MoveNet multipose SavedModel (as used in persondetect_test.py) and its .tflite
+MOVENET_MODEL_DIR = "/home/jt/Documents/py/crawler/models/movenet_multipose"
+MOVENET_TFLITE_PATH = os.path.join(MOVENET_MODEL_DIR, "model.tflite")
+
+LABELS_PATH = "/home/jt/Documents/py/crawler/labels/ImageNetLabels.txt"
+
+def build_engine(localization="classify", engine="tflite", tflite_model_path=None, num_threads=None):
+    '''
+    Load the model a PersonFollower with this localization needs. Split
+    out so it can be loaded (and warmed up) while the hardware initializes;
+    pass the result to PersonFollower as `engine`.
+    '''
+    if localization == "detect":
+        # TFLite is much lighter on the Pi; the SavedModel is the fallback
+        return create_engine(engine, keras_model_path=MOVENET_MODEL_DIR,
+                             tflite_model_path=tflite_model_path or MOVENET_TFLITE_PATH,
+                             num_threads=num_threads, input_shape=(None, 256, 256, 3),
+                             input_dtype=np.int32, signature="serving_default", output_key="output_0")
+    elif localization == "classify":
+        return create_engine(engine, keras_model_path=MODEL_DIR,
+                             tflite_model_path=tflite_model_path or TFLITE_MODEL_PATH,
+                             num_threads=num_threads, input_shape=(None, 128, 128, 3))
+    else:
+        raise ValueError("Invalid localization. Use 'classify' or 'detect'.")
+
+class FrameAnalyzer:
+    '''
+    The model side of PersonFollower: finds the person in a frame. Kept
+    separate from drawing and servo control so it can also run in an
+    InferenceWorker process.
+
+    "classify" runs MobileNetV2 on the whole frame and can only say
+    whether a person is present. "detect" finds people with MoveNet and
+    tracks the box between detections, giving a real position.
+
+    With several cameras, analyze_batch() takes one frame per camera and
+    runs them through the model as a single batch; each camera keeps its
+    own tracker.
+    '''
+
+    def __init__(self, engine, localization="classify", tracker="flow", detect_interval=10, cameras=1):
+        self.engine = engine
+        self.localizers = []
+        self.batching = True  # Cleared if the model turns out to need a batch of 1
+        self.model_runs = 0   # Batches run through the model; tracked frames don't count
+
+        if localization == "detect":
+            self.detector = MoveNetDetector(self.engine)
+            self.localizers = [DetectTrackLocalizer(self.detector, tracker_kind=tracker, detect_interval=detect_interval)
+                               for _ in range(cameras)]
+            self.poses = [None] * cameras  # Each camera's poses from its latest detection
+        else:
+            # Frames are preprocessed straight into the engine's input buffer
+            self._build_preprocessors()
+
+            # Load ImageNet labels from the file
+            if not os.path.exists(LABELS_PATH):
+                raise FileNotFoundError(f"Labels file not found at {LABELS_PATH}. Please ensure the file exists.")
+            with open(LABELS_PATH, "r") as f:
+                self.imagenet_labels = [line.strip() for line in f.readlines()]
+
+    def _build_preprocessors(self):
+        # One per batch slot, each filling its slice of the input
+        self.preprocessors = [Preprocessor(self.engine.input_shape, dtype=self.engine.input_dtype,
+                                           quantization=self.engine.input_quantization,
+                                           out=self.engine.input_buffer[i:i + 1])
+                              for i in range(self.engine.input_shape[0])]
+
+    def configure(self, input_size=None, detect_interval=None):
+        '''Change the model input size and detection interval (detect mode only). Call between frames.'''
+        if not self.localizers:
+            return
+        if input_size is not None:
+            self.detector.set_input_size(input_size)
+        if detect_interval is not None:
+            for localizer in self.localizers:
+                localizer.detect_interval = detect_interval
+
+    def input_view(self):
+        '''RGB uint8 view of the latest model input (the first camera's).'''
+        preprocessor = self.detector.preprocessor if self.localizers else self.preprocessors[0]
+        return preprocessor.view()
+
+    def analyze(self, frame, marks=None):
+        '''
+        Returns (center_x, center_y, box, caption, poses). The center is
+        None when no person was found, box is None unless a box was
+        detected or tracked, and caption is the text to draw (or None).
+        poses are the PoseEstimation poses from the latest detection
+        (detect mode only, otherwise None); between detections they lag
+        the tracked box.
+        '''
+        return self.analyze_batch([frame], marks)[0]
+
+    def analyze_batch(self, frames, marks=None):
+        '''analyze() for one frame per camera, in camera order, with one model call.'''
+        if self.localizers:
+            return self.locate_people(frames, marks)
+
+        if self.batching and not set_batch_size(self.engine, len(frames)):
+            self.batching = False
+        if not self.batching:
+            set_batch_size(self.engine, 1)
+        # Any resize, even a failed one that resizes back, replaces the input buffer
+        if not np.may_share_memory(self.preprocessors[0].input, self.engine.input_buffer):
+            self._build_preprocessors()
+
+        results = []
+        batch = len(self.preprocessors)
+        for start in range(0, len(frames), batch):
+            chunk = frames[start:start + batch]
+            # Resize, convert to RGB and normalize/quantize into the model input
+            for preprocessor, frame in zip(self.preprocessors, chunk):
+                preprocessor(frame)
+            if marks is not None:
+                mark(marks, "preprocess")
+
+            # Run inference
+            output = self.engine.predict(self.engine.input_buffer)
+            self.model_runs += 1
+            if marks is not None:
+                mark(marks, "inference")
+            results.extend(self.classify(logits, frame) for logits, frame in zip(output, chunk))
+        return results
+
+    def classify(self, logits, frame):
+        # Get the predicted class and confidence (softmax of the winning logit)
+        predicted_class = int(np.argmax(logits))
+        confidence = 1.0 / np.sum(np.exp(logits - logits[predicted_class]))
+
+        # Map the predicted class to a label (assuming ImageNet labels)
+        label = self.imagenet_labels[predicted_class] if predicted_class < len(self.imagenet_labels) else "Unknown"
+        caption = f"{label} ({confidence:.2f})"
+
+        # If the predicted class is 'person', return the center of the frame
+        if label == "person":
+            height, width = frame.shape[:2]
+            return width // 2, height // 2, None, caption, None
+
+        return None, None, None, caption, None
+
+    def locate_people(self, frames, marks=None):
+        '''
+        Detect or track the followed person in each frame and return the
+        centers of their boxes. When any camera needs a detection, all of
+        them get one: the batch costs about the same as a single frame,
+        and it keeps the cameras' detections in step.
+        '''
+        located = [localizer.track(frame) for localizer, frame in zip(self.localizers, frames)]
+        if None in located:
+            self.poses[:len(frames)] = self.detector.detect_batch(frames, marks)
+            self.model_runs += 1
+            located = [localizer.update(frame, poses["box"], poses["score"])
+                       for localizer, frame, poses in zip(self.localizers, frames, self.poses)]
+
+        results = []
+        for (box, confidence, source), poses in zip(located, self.poses):
+            if box is None:
+                results.append((None, None, None, None, None))
+                continue
+            x1, y1, x2, y2 = box.astype(int)
+            results.append(((x1 + x2) // 2, (y1 + y2) // 2, box, f"person {source} ({confidence:.2f})", poses))
+        return results
+
+def annotate(frame, box, caption, poses=None):
+    '''Draw an analysis result (and skeletons, if poses are given) on the frame in place.'''
+    if poses is not None:
+        draw_poses(frame, poses, boxes=False)
+    if box is not None:
+        draw_detection(frame, box, caption)
+    elif caption:
+        cv2.putText(frame, caption, (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
+
 class PersonFollower:
-    def __init__(self, vehicle_controller: VehicleController, usb_cam: USBCamera):
-        # Load the MobileNetV2 model using hub.KerasLayer
-        # Ensure the model path points to the directory containing `saved_model.pb`
-        local_model_path = "/home/jt/Documents/py/crawler/models/mobilenet_v2"
-        if not os.path.exists(os.path.join(local_model_path, "saved_model.pb")):
-            raise FileNotFoundError(f"Model not found at {local_model_path}. Please ensure the directory contains `saved_model.pb`." )
-        print("Loading MobileNetV2 model from local path:", local_model_path)
-        self.model = hub.KerasLayer(local_model_path, trainable=False)
-        self.model.build([None, 128, 128, 3])  # Batch input shape
+    def __init__(self, vehicle_controller: VehicleController, usb_cam: USBCamera,
+                 engine="tflite", tflite_model_path=None, num_threads=None,
+                 localization="classify", tracker="flow", detect_interval=10, telemetry=None,
+                 pan_tilt_mode="step", manual_override=None, inference_process=False, motion_gate=False,
+                 draw_poses=True):
+        # See FrameAnalyzer for the localization modes. `engine` is an engine
+        # kind ("tflite"/"keras") or an engine already built by build_engine()
+        # for this localization. With inference_process=True the model runs
+        # in an InferenceWorker process instead and `engine` must be a kind.
+        #
+        # usb_cam is a camera or a list of them. The first one is on the
+        # pan/tilt mount and drives the servos; frames from the others
+        # (e.g. rear or wide-angle) are captured alongside it, analyzed in
+        # the same batch, and reported per camera.
+        self.cameras = list(usb_cam) if isinstance(usb_cam, (list, tuple)) else [usb_cam]
+        self.worker = None
+        self.analyzer = None
+        if inference_process:
+            if not isinstance(engine, str):
+                raise ValueError("inference_process needs an engine kind, not a loaded engine.")
+            if len(self.cameras) > 1:
+                raise ValueError("inference_process supports a single camera.")
+            from InferenceWorker import InferenceWorker
+            self.worker = InferenceWorker({"localization": localization, "engine": engine,
+                                           "tflite_model_path": tflite_model_path, "num_threads": num_threads,
+                                           "tracker": tracker, "detect_interval": detect_interval})
+        else:
+            if isinstance(engine, str):
+                engine = build_engine(localization, engine, tflite_model_path, num_threads)
+            self.analyzer = FrameAnalyzer(engine, localization, tracker, detect_interval, cameras=len(self.cameras))
 
         # Initialize camera and vehicle controller
-        self.camera = usb_cam
+        self.camera = self.cameras[0]
         self.controller = vehicle_controller
 
-        # Frame dimensions (assume 320x240 for now, adjust dynamically if needed)
-        self.frame_width = 320
-        self.frame_height = 240
-        self.frame_center_x = self.frame_width // 2
-        self.frame_center_y = self.frame_height // 2
+        # Optional Telemetry.TelemetryRecorder for per-frame decisions
+        self.telemetry = telemetry
+
+        # Frame dimensions, updated from each frame the camera delivers
+        self._set_frame_size(320, 240)
+
+        # Runtime inference settings (see configure_inference). Changes are
+        # picked up by the inference stage before its next frame.
+        self.frame_stride = 1
+        self.frames_since_inference = 0  # Frames the infer stage has received since the model last ran
+        self.pending_config = None
+        self.config_lock = threading.Lock()
+
+        # With motion_gate, frames that barely differ from the last analyzed
+        # one reuse its result instead of running the model (see MotionGate)
+        self.motion_gate = MotionGate(cameras=len(self.cameras)) if motion_gate else None
+        self.last_results = [(None, None, None, None, None)] * len(self.cameras)
+
+        # Draw MoveNet skeletons on the annotated frame (detect mode). Turn
+        # off when nobody is watching.
+        self.draw_poses = draw_poses
 
         # Pan/Tilt adjustment parameters
         self.pan_step = 2  # Degrees to adjust per frame
         self.tilt_step = 2
 
+        # "step" nudges pan/tilt a fixed step per processed frame. "predictive"
+        # filters detections and drives the servos from control_step() at the
+        # control rate, leading the target by the measured latency.
+        if pan_tilt_mode not in ("step", "predictive"):
+            raise ValueError("Invalid pan_tilt_mode. Use 'step' or 'predictive'.")
+        self.pan_tilt_controller = PredictivePanTilt() if pan_tilt_mode == "predictive" else None
+
+        # threading.Event set while the operator has taken over (see
+        # Joystick.JoystickService). The follower leaves the servos alone then.
+        self.manual_override = manual_override
+
         # Initial pan/tilt angles
         self.pan_angle = 90
         self.tilt_angle = 90
         self.controller.set_pan_tilt(0, 0)  # Set to neutral
 
-        self.person_detected = False
-
-        # Load ImageNet labels from the file
-        labels_path = "/home/jt/Documents/py/crawler/labels/ImageNetLabels.txt"
-        if not os.path.exists(labels_path):
-            raise FileNotFoundError(f"Labels file not found at {labels_path}. Please ensure the file exists.")
-        with open(labels_path, "r") as f:
-            self.imagenet_labels = [line.strip() for line in f.readlines()]
-
-        # Threading setup
-        self.thread = threading.Thread(target=self._run_yolo_processing, daemon=True)
-        self.stop_event = threading.Event()
-        self.latest_frame = None
-        self.latest_detections = None
-
-        self.latest_input_tensor = None
-
-    def get_latest_frame(self):
-        '''Get the latest processed frame.'''
-        return self.latest_frame
-    
-    def get_latest_input_tensor(self):
-        '''Get the latest input tensor used for model inference.'''
-        return self.latest_input_tensor
+        # Annotated, one per camera; read them through read_latest_frame()
+        self.latest_frames = [None] * len(self.cameras)
+        self.latest_frame_seq = 0
+        self.camera_results = [None] * len(self.cameras)
+
+        # Copy of the model input from the last frame the model ran on, for
+        # the dashboard, with its own seq; leased like latest_frames
+        self.latest_input = None
+        self.latest_input_seq = 0
+        self.input_buffers = queue.SimpleQueue()  # Fills up with released copies
+
+        # Pools of reusable frame buffers, one per camera, so reads don't
+        # allocate. A buffer is owned by exactly one place at a time:
+        # capture, a queue, inference, or latest_frames. Published frames
+        # are read from other threads (dashboard, stream encoder) through
+        # read_latest_frame(), which leases the buffer; one replaced while
+        # leased goes back to its pool when the last reader lets go.
+        self.free_buffers = [queue.SimpleQueue() for _ in self.cameras]
+        for pool in self.free_buffers:
+            for _ in range(5):
+                pool.put(None)  # Allocated by the camera on first use
+        self.frame_seq = None
+        self.frame_lock = threading.Lock()
+        self.leases = {}   # id(buffer) -> readers holding it
+        self.retired = {}  # id(buffer) -> (pool, buffer) replaced while leased
+
+        # Pipeline: capture -> infer (preprocess, model, post-process) -> actuate.
+        # Latest-value queues drop stale work, so each stage runs at its own
+        # pace and throughput is set by the slowest stage, not the sum.
+        self.frame_queue = LatestQueue(on_drop=self._recycle)
+        self.result_queue = LatestQueue()
+        self.stats = PipelineStats()
+        self.stages = [
+            Stage("capture", self._capture, sink=self.frame_queue),
+            Stage("infer", self._infer, source=self.frame_queue, sink=self.result_queue),
+            Stage("actuate", self._actuate, source=self.result_queue),
+        ]
+
+    def _set_frame_size(self, width, height):
+        self.frame_width = width
+        self.frame_height = height
+        self.frame_center_x = width // 2
+        self.frame_center_y = height // 2
+
+    def configure_inference(self, input_size=None, detect_interval=None, frame_stride=None):
+        '''
+        Change how much inference work is done, at runtime: the model input
+        size and detection interval (detect mode), and frame_stride, which
+        runs the model on only every Nth frame.
+        '''
+        if frame_stride is not None:
+            self.frame_stride = max(1, frame_stride)
+        config = {"input_size": input_size, "detect_interval": detect_interval}
+        config = {name: value for name, value in config.items() if value is not None}
+        if config:
+            with self.config_lock:
+                self.pending_config = {**(self.pending_config or {}), **config}
+
+    def read_latest_frame(self, camera=0):
+        '''
+        Lease a camera's latest processed frame: a context manager yielding
+        (seq, frame), whose buffer won't be reused for capture until the
+        block exits. frame is None before the first one.
+        '''
+        return self._lease(lambda: (self.latest_frame_seq, self.latest_frames[camera]))
+
+    def read_latest_input(self):
+        '''
+        Lease an RGB uint8 copy of the latest model input (the first
+        camera's), like read_latest_frame(). Its seq only changes when the
+        model runs, not on frames the motion gate or stride skipped or the
+        tracker handled. The image is None before the first inference, and
+        with an inference process.
+        '''
+        return self._lease(lambda: (self.latest_input_seq, self.latest_input))
+
+    @contextmanager
+    def _lease(self, read):
+        with self.frame_lock:
+            seq, buffer = read()
+            if buffer is not None:
+                self.leases[id(buffer)] = self.leases.get(id(buffer), 0) + 1
+        try:
+            yield seq, buffer
+        finally:
+            if buffer is not None:
+                with self.frame_lock:
+                    self.leases[id(buffer)] -= 1
+                    if self.leases[id(buffer)] == 0:
+                        del self.leases[id(buffer)]
+                        retired = self.retired.pop(id(buffer), None)
+                        if retired is not None:
+                            pool, buffer = retired
+                            pool.put(buffer)
+
+    def _replace_published(self, pool, buffer):
+        # Call with frame_lock held: recycle a buffer that is no longer the
+        # latest, unless a reader still holds it
+        if id(buffer) in self.leases:
+            self.retired[id(buffer)] = (pool, buffer)
+        else:
+            pool.put(buffer)
+
+    def _publish_input(self, view):
+        try:
+            buffer = self.input_buffers.get_nowait()
+        except queue.Empty:
+            buffer = None
+        if buffer is None or buffer.shape != view.shape:
+            buffer = np.empty_like(view)  # First copy, or the input size changed
+        np.copyto(buffer, view)
+        with self.frame_lock:
+            previous, self.latest_input = self.latest_input, buffer
+            self.latest_input_seq += 1
+            if previous is not None:
+                self._replace_published(self.input_buffers, previous)
+
+    def get_camera_results(self):
+        '''
+        Per-camera result of the latest processed frames: a dict with
+        "person", "center" and "box" (pixels), or None before the first.
+        '''
+        return list(self.camera_results)
+
+    def get_latest_frame_seq(self):
+        '''Sequence number of the latest processed frame; changes when a new one is published.'''
+        return self.latest_frame_seq
+
+    def get_stats(self):
+        '''
+        Latency percentiles (ms) per stage and glass-to-command, plus FPS and
+        how many stale frames/results each queue dropped.
+        '''
+        snapshot = self.stats.snapshot()
+        snapshot["dropped"] = {"frames": self.frame_queue.dropped, "results": self.result_queue.dropped}
+        if self.motion_gate is not None:
+            snapshot["motion_gate"] = self.motion_gate.get_stats()
+        if self.worker is not None:
+            snapshot["worker"] = self.worker.get_stats()
+        return snapshot
 
     def start(self):
-        '''Start the YOLO processing thread.'''
-        self.thread.start()
+        '''Start the pipeline stage threads (and the inference process, if used).'''
+        if self.worker is not None:
+            self.worker.start()
+        for stage in self.stages:
+            stage.start()
 
     def stop(self):
-        '''Stop the YOLO processing thread.'''
-        self.stop_event.set()
-        self.thread.join()
+        '''Stop the pipeline stage threads.'''
+        for stage in self.stages:
+            stage.stop()
+        if self.worker is not None:
+            self.worker.stop()
 
-    def _run_yolo_processing(self):
-        while not self.stop_event.is_set():
-            self.process_and_adjust()
+    def _recycle(self, packet):
+        for pool, frame in zip(self.free_buffers, packet.frames):
+            pool.put(frame)
 
-    def process_and_adjust(self):
-        '''Process the latest frame and adjust servos accordingly.'''
+    def _take_buffer(self, index):
         try:
-            # Capture frame from camera
-            frame = self.camera.get_frame()
-
-            # Resize frame to reduce computational load
-            # frame = cv2.resize(frame, (self.frame_width, self.frame_height))
-
-            # Process frame to detect person
-            person_center_x, person_center_y, processed_frame = self.process_frame(frame)
-
-            # Update the latest processed frame
-            self.latest_frame = processed_frame
-
-            # Adjust servos to keep person in frame
-            self.adjust_servos(person_center_x, person_center_y)
+            return self.free_buffers[index].get_nowait()
+        except queue.Empty:
+            return None  # Pool ran dry (e.g. after an error); allocate
+
+    def _capture(self, _=None):
+        '''Capture stage: the only reader of the cameras.'''
+        # Wait for a frame newer than the last one we handed out
+        frame, self.frame_seq, capture_time = self.camera.read(out=self._take_buffer(0), last_seq=self.frame_seq)
+        packet = FramePacket(self.frame_seq, frame, capture_time)
+
+        # Then take the newest frame from each other camera, so the set is
+        # as close together in time as their frame rates allow
+        for index, camera in enumerate(self.cameras[1:], start=1):
+            frame, _, capture_time = camera.read(out=self._take_buffer(index))
+            packet.frames.append(frame)
+            packet.capture_times.append(capture_time)
+
+        packet.pan, packet.tilt = self.pan_angle, self.tilt_angle
+        mark(packet.marks, "read")
+        return packet
+
+    def _infer(self, packet):
+        '''Inference stage: the only user of the model.'''
+        mark(packet.marks, "dequeue")
+        with self.config_lock:
+            config, self.pending_config = self.pending_config, None
+        if config:
+            (self.worker or self.analyzer).configure(**config)
+            if self.motion_gate is not None:
+                self.motion_gate.reset()  # Let the new settings produce a result
+
+        # Count the frames that reach this stage, not camera seqs: the queue
+        # drops frames when inference is slow, so seqs would skip the stride
+        self.frames_since_inference += 1
+        if self.frames_since_inference >= self.frame_stride:
+            self.frames_since_inference = 0
+            results = self.process_frames(packet.frames, packet.marks, packet.seq)
+            packet.center_x, packet.center_y, _ = results[0]
+        mark(packet.marks, "postprocess")  # Frames skipped by the stride are published as captured
+
+        # Publish the annotated frames and recycle the ones they replace,
+        # unless a reader still holds them
+        with self.frame_lock:
+            previous, self.latest_frames = self.latest_frames, list(packet.frames)
+            self.latest_frame_seq = packet.seq
+            for pool, frame in zip(self.free_buffers, previous):
+                if frame is not None:
+                    self._replace_published(pool, frame)
+        return packet
+
+    def _actuate(self, packet):
+        '''
+        Actuation stage: the only writer of the pan/tilt servos in step mode.
+        In predictive mode it only feeds the filter; control_step() writes.
+        '''
+        height, width = packet.frame.shape[:2]
+        if (width, height) != (self.frame_width, self.frame_height):
+            self._set_frame_size(width, height)  # Camera resolution changed
+        if self.pan_tilt_controller is not None:
+            self.pan_tilt_controller.update(packet.center_x, packet.center_y, width, height,
+                                            packet.capture_time, packet.pan, packet.tilt)
+        elif not self._overridden():
+            self.adjust_servos(packet.center_x, packet.center_y)
+        mark(packet.marks, "actuate")
+        self.stats.record_frame(packet.marks)
+        if self.telemetry is not None:
+            self.telemetry.record_decision(packet.seq, packet.center_x, packet.center_y,
+                                           self.pan_angle, self.tilt_angle)
+
+    def control_step(self):
+        '''
+        Predictive mode: move pan/tilt toward the predicted target. Call at
+        the control rate (e.g. as a ControlScheduler task).
+        '''
+        if self.pan_tilt_controller is None or self._overridden():
+            return
+        angles = self.pan_tilt_controller.step(self.pan_angle, self.tilt_angle)
+        if angles is None:
+            return  # No recent detection; hold position
+        self.pan_angle, self.tilt_angle = angles
+        self.controller.set_pan_tilt((self.pan_angle - 90) / 90, (self.tilt_angle - 90) / 90)
+
+    def _overridden(self):
+        return self.manual_override is not None and self.manual_override.is_set()
 
+    def process_and_adjust(self):
+        '''
+        Run one frame through every stage synchronously. Don't call this
+        while the pipeline threads are running.
+        '''
+        try:
+            self._actuate(self._infer(self._capture()))
         except Exception as e:
             print(f"Error in process_and_adjust: {e}")
 
-    def process_frame(self, frame):
-        # Preprocess the frame to match the model's input requirements
-        input_tensor = tf.convert_to_tensor(frame, dtype=tf.float32)  # Convert to float32
-        input_tensor = tf.image.resize(input_tensor, [128, 128])  # Resize to 128x128 pixels
-        input_tensor = tf.image.rgb_to_grayscale(input_tensor)  # Convert to grayscale
-        input_tensor = input_tensor / 255.0  # Normalize to [0,1]
-
-        # Update the dashboard with the exact input tensor
-        self.latest_input_tensor = input_tensor
-
-        # Run inference
-        logits = self.model(input_tensor)
-
-        # Get the predicted class and confidence
-        predicted_class = tf.argmax(logits, axis=-1).numpy()[0]
-        confidence = tf.nn.softmax(logits, axis=-1).numpy()[0][predicted_class]
-
-        # Debug: Print the predicted class and confidence
-        print(f"Predicted class: {predicted_class}, Confidence: {confidence:.2f}")
-
-        # Map the predicted class to a label (assuming ImageNet labels)
-        label = self.imagenet_labels[predicted_class] if predicted_class < len(self.imagenet_labels) else "Unknown"
-
-        # Visualize the prediction on the frame
-        cv2.putText(frame, f"{label} ({confidence:.2f})", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 1, (0, 255, 0), 2)
-
-        # If the predicted class is 'person', return the center of the frame
-        if label == "person":
-            person_center_x = self.frame_width // 2
-            person_center_y = self.frame_height // 2
-            return person_center_x, person_center_y, frame
-        
-        self.latest_frame = frame
-
-        return None, None, frame
+    def process_frame(self, frame, marks=None, seq=0):
+        '''Find the person, draw the result on the frame, and return (center_x, center_y, frame).'''
+        return self.process_frames([frame], marks, seq)[0]
+
+    def process_frames(self, frames, marks=None, seq=0):
+        '''
+        process_frame() for one frame per camera, in camera order, with a
+        single batched model call. Returns [(center_x, center_y, frame)].
+        '''
+        if self.motion_gate is not None and not self.motion_gate.should_run(*frames):
+            # Nothing moved since the last analyzed frames; their answers still hold
+            results = self.last_results
+        elif self.worker is not None:
+            result = self.worker.process(frames[0], seq, marks)
+            if result is None:
+                return [(None, None, frame) for frame in frames]  # Worker (re)starting or timed out; skip
+            results = [result]
+        else:
+            model_runs = self.analyzer.model_runs
+            results = self.analyzer.analyze_batch(frames, marks)
+            if self.analyzer.model_runs != model_runs:
+                # Give the dashboard a copy of what the model saw
+                self._publish_input(self.analyzer.input_view())
+        self.last_results = results
+
+        processed = []
+        for index, (frame, (center_x, center_y, box, caption, poses)) in enumerate(zip(frames, results)):
+            annotate(frame, box, caption, poses if self.draw_poses else None)
+            self.camera_results[index] = {"person": center_x is not None,
+                                          "center": None if center_x is None else (int(center_x), int(center_y)),
+                                          "box": None if box is None else [float(v) for v in box]}
+            processed.append((center_x, center_y, frame))
+        return processed
 
     def adjust_servos(self, person_center_x, person_center_y):
         # Calculate pan/tilt adjustments
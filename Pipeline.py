@@ -0,0 +1,104 @@
+import collections
+import threading
+import time
+
+class LatestQueue:
+    '''
+    Bounded queue with drop-oldest semantics. A slow consumer always gets
+    the freshest items instead of working through a backlog. Dropped
+    items are passed to `on_drop` so their buffers can be recycled.
+    '''
+
+    def __init__(self, maxsize=1, on_drop=None):
+        self.items = collections.deque()
+        self.maxsize = maxsize
+        self.on_drop = on_drop
+        self.dropped = 0
+        self.closed = False
+        self.condition = threading.Condition()
+
+    def put(self, item):
+        with self.condition:
+            if len(self.items) >= self.maxsize:
+                stale = self.items.popleft()
+                self.dropped += 1
+                if self.on_drop is not None:
+                    self.on_drop(stale)
+            self.items.append(item)
+            self.condition.notify()
+
+    def get(self, timeout=None):
+        '''Return the oldest queued item, or None on timeout or close.'''
+        with self.condition:
+            if not self.condition.wait_for(lambda: self.items or self.closed, timeout):
+                return None
+            return self.items.popleft() if self.items else None
+
+    def close(self):
+        with self.condition:
+            self.closed = True
+            self.condition.notify_all()
+
+class FramePacket:
+    '''
+    A captured frame and everything the pipeline learns about it. With
+    several cameras, `frames` holds one frame per camera, starting with
+    `frame` (the pan/tilt camera's), which the timing and servo fields
+    refer to.
+    '''
+    __slots__ = ("seq", "frame", "frames", "capture_time", "capture_times", "center_x", "center_y",
+                 "pan", "tilt", "marks")
+
+    def __init__(self, seq, frame, capture_time):
+        self.seq = seq
+        self.frame = frame
+        self.frames = [frame]
+        self.capture_time = capture_time
+        self.capture_times = [capture_time]
+        self.center_x = None
+        self.center_y = None
+        self.pan = None   # Commanded pan/tilt angles when the frame was captured
+        self.tilt = None
+        # Stage timestamps for latency stats (see Instrumentation.FRAME_MARKS)
+        self.marks = {"capture": capture_time}
+
+class Stage:
+    '''
+    One pipeline stage on its own worker thread. `work` takes an item from
+    `source` (or None for a source stage) and returns an item for `sink`,
+    or None to pass nothing on.
+    '''
+
+    def __init__(self, name, work, source=None, sink=None):
+        self.name = name
+        self.work = work
+        self.source = source
+        self.sink = sink
+        self.stop_event = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+
+    def start(self):
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.source is not None:
+            self.source.close()
+        if self.thread.is_alive():
+            self.thread.join(timeout=2.0)
+
+    def _run(self):
+        while not self.stop_event.is_set():
+            item = None
+            if self.source is not None:
+                item = self.source.get(timeout=0.1)
+                if item is None:
+                    continue
+            try:
+                result = self.work(item)
+            except Exception as e:
+                print(f"Error in {self.name} stage: {e}")
+                time.sleep(0.1)  # Don't spin on a persistent failure
+                continue
+            if result is not None and self.sink is not None:
+                self.sink.put(result)
@@ -0,0 +1,83 @@
+import cv2
+import numpy as np
+
+KEYPOINT_NAMES = [
+    "nose", "left_eye", "right_eye", "left_ear", "right_ear",
+    "left_shoulder", "right_shoulder", "left_elbow", "right_elbow", "left_wrist", "right_wrist",
+    "left_hip", "right_hip", "left_knee", "right_knee", "left_ankle", "right_ankle",
+]
+
+# Keypoint index pairs joined by a bone
+SKELETON = np.array([
+    (0, 1), (0, 2), (1, 3), (2, 4),                    # Head
+    (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),           # Arms
+    (11, 12), (11, 13), (13, 15), (12, 14), (14, 16),  # Legs
+])
+
+MAX_PEOPLE = 6  # MoveNet multipose always returns 6 candidates
+
+# One decoded person, in pixels. Keypoints below the keypoint threshold
+# are kept (for their position) but not marked visible.
+POSE_DTYPE = np.dtype([
+    ("box", np.float32, (4,)),             # x1, y1, x2, y2
+    ("score", np.float32),
+    ("keypoints", np.float32, (17, 2)),    # x, y
+    ("keypoint_scores", np.float32, (17,)),
+    ("visible", np.bool_, (17,)),
+])
+
+def decode_poses(output, width, height, score_threshold=0.3, keypoint_threshold=0.3):
+    '''
+    Decode MoveNet multipose output_0 for one image ((6, 56) or (1, 6, 56))
+    into a POSE_DTYPE array of the people above score_threshold (all of
+    the candidates if it's None).
+
+    Each row of the output is 17 (y, x, score) keypoints followed by
+    ymin, xmin, ymax, xmax, score, all normalized to 0-1.
+    '''
+    output = np.asarray(output).reshape(-1, 56)
+    people = output if score_threshold is None else output[output[:, 55] > score_threshold]
+    keypoints = people[:, :51].reshape(-1, 17, 3)
+
+    poses = np.empty(len(people), dtype=POSE_DTYPE)
+    poses["box"] = people[:, [52, 51, 54, 53]] * (width, height, width, height)
+    poses["score"] = people[:, 55]
+    poses["keypoints"] = keypoints[:, :, [1, 0]] * (width, height)
+    poses["keypoint_scores"] = keypoints[:, :, 2]
+    poses["visible"] = keypoints[:, :, 2] > keypoint_threshold
+    return poses
+
+def draw_poses(image, poses, boxes=True, box_threshold=0.0, bone_color=(255, 0, 0), joint_color=(0, 0, 255),
+               box_color=(0, 255, 0), joint_radius=5):
+    '''
+    Draw boxes (optionally only for people scoring above box_threshold),
+    joints and bones for decoded poses on the image in place, in that
+    order. Each kind of primitive is drawn with a single cv2.polylines
+    call however many people there are; joints are zero-length lines,
+    which OpenCV draws as filled dots. Coordinates are truncated to whole
+    pixels and boxes clamped to the image, like cv2.rectangle/circle/line
+    calls with int() coordinates would be.
+    '''
+    if len(poses) == 0:
+        return image
+
+    if boxes:
+        height, width = image.shape[:2]
+        shown = poses["box"][poses["score"] > box_threshold].astype(np.int32)
+        if len(shown):
+            x1, y1 = np.maximum(shown[:, 0], 0), np.maximum(shown[:, 1], 0)
+            x2, y2 = np.minimum(shown[:, 2], width), np.minimum(shown[:, 3], height)
+            corners = np.stack([np.stack([x1, y1], 1), np.stack([x2, y1], 1),
+                                np.stack([x2, y2], 1), np.stack([x1, y2], 1)], axis=1)
+            cv2.polylines(image, corners, True, box_color, 2)
+
+    joints = poses["keypoints"][poses["visible"]].astype(np.int32)
+    if len(joints):
+        cv2.polylines(image, np.repeat(joints[:, None, :], 2, axis=1), False, joint_color, 2 * joint_radius)
+
+    # Bones whose two ends are both visible: (bones, 2 points, xy)
+    ends = poses["keypoints"][:, SKELETON]
+    shown = poses["visible"][:, SKELETON].all(axis=2)
+    if shown.any():
+        cv2.polylines(image, ends[shown].astype(np.int32), False, bone_color, 2)
+    return image
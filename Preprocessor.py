@@ -0,0 +1,52 @@
+import cv2
+import numpy as np
+
+class Preprocessor:
+    '''
+    Converts BGR camera frames into a model input batch without allocating.
+    Resizing and BGR->RGB conversion write into preallocated uint8 buffers,
+    then a 256-entry lookup table maps pixels straight to the model's input
+    dtype, folding normalization and quantization into a single pass.
+    '''
+
+    def __init__(self, input_shape, dtype=np.float32, quantization=(0.0, 0), normalize=True, out=None):
+        _, height, width, channels = input_shape
+        if channels != 3:
+            raise ValueError(f"Expected a 3-channel model input, got {channels} channels.")
+        self.size = (int(width), int(height))
+        self.dtype = np.dtype(dtype)
+
+        self.resized = np.empty((height, width, 3), dtype=np.uint8)
+        self.input = out if out is not None else np.empty((1, height, width, 3), dtype=self.dtype)
+        if self.input.shape[1:] != (height, width, 3) or self.input.dtype != self.dtype:
+            raise ValueError("Output buffer doesn't match the model input shape and dtype.")
+
+        # Pixel value -> model input value, e.g. /255 for float models or
+        # (x/255)/scale + zero_point for quantized ones
+        values = np.arange(256, dtype=np.float64)
+        if normalize:
+            values /= 255.0
+        scale, zero_point = quantization
+        if scale and np.issubdtype(self.dtype, np.integer):
+            info = np.iinfo(self.dtype)
+            values = np.clip(np.round(values / scale + zero_point), info.min, info.max)
+        self.lut = values.astype(self.dtype)
+
+        # uint8 models that want raw pixels skip the table entirely
+        self.identity = self.dtype == np.uint8 and np.array_equal(self.lut, np.arange(256))
+        self.rgb = self.input[0] if self.identity else np.empty((height, width, 3), dtype=np.uint8)
+
+    def __call__(self, frame):
+        '''Preprocess one frame and return the (1, H, W, 3) input batch.'''
+        cv2.resize(frame, self.size, dst=self.resized, interpolation=cv2.INTER_AREA)
+        cv2.cvtColor(self.resized, cv2.COLOR_BGR2RGB, dst=self.rgb)
+        if not self.identity:
+            cv2.LUT(self.rgb, self.lut, dst=self.input[0])
+        return self.input
+
+    def view(self):
+        '''
+        RGB uint8 image of what the model last saw, for display. This is a
+        live buffer that the next frame overwrites.
+        '''
+        return self.rgb
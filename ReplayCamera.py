@@ -0,0 +1,141 @@
+import cv2
+import os
+import time
+import numpy as np
+
+IMAGE_EXTENSIONS = (".jpg", ".jpeg", ".png", ".bmp")
+
+class ReplayCamera:
+    '''
+    Drop-in replacement for USBCamera that plays back a recorded session
+    from a video file or a directory of frames.
+
+    mode="realtime" paces frames at the recording's own rate,
+    mode="fixed" paces them at `fps`, and mode="fast" returns them
+    as quickly as they can be decoded.
+    '''
+
+    def __init__(self, source, mode="realtime", fps=30, loop=False):
+        if mode not in ("realtime", "fixed", "fast"):
+            raise ValueError("Invalid replay mode. Use 'realtime', 'fixed', or 'fast'.")
+        if not os.path.exists(source):
+            raise RuntimeError(f"Replay source not found: {source}")
+
+        self.source = source
+        self.mode = mode
+        self.loop = loop
+        self.fps = fps
+
+        self.cap = None
+        self.frame_paths = None
+        if os.path.isdir(source):
+            self.frame_paths = sorted(
+                os.path.join(source, name) for name in os.listdir(source)
+                if name.lower().endswith(IMAGE_EXTENSIONS))
+            if not self.frame_paths:
+                raise RuntimeError(f"No frames found in replay directory: {source}")
+            recorded_fps = fps
+        else:
+            self.cap = cv2.VideoCapture(source)
+            if not self.cap.isOpened():
+                raise RuntimeError(f"Failed to open replay video: {source}")
+            recorded_fps = self.cap.get(cv2.CAP_PROP_FPS) or fps
+
+        self.position = 0
+        self.latest_seq = 0
+        # Frames are scheduled from start_time, counting from base_seq;
+        # both move when the rate changes
+        self.start_time = None
+        self.base_seq = 0
+        self.last_due = None
+
+        # Realtime replays at the recorded rate, fixed at the requested one
+        self.frame_interval = 0.0
+        if mode == "realtime":
+            self.frame_interval = 1.0 / recorded_fps
+        elif mode == "fixed":
+            self.set_fps(fps)
+
+        # Optional (width, height) to scale frames to, standing in for a
+        # camera resolution change. frame_size is the size of the last frame.
+        self.resolution = None
+        self.frame_size = None
+        print(f"Replaying {source} ({mode})")
+
+    def set_fps(self, fps):
+        self.fps = fps
+        if self.mode == "fixed":
+            self.frame_interval = 1.0 / fps
+            if self.last_due is not None:
+                # Mid-run: the next frame is one new interval after the last
+                self.start_time = self.last_due
+                self.base_seq = self.latest_seq - 1
+
+    def set_resolution(self, width, height):
+        '''Scale frames to width x height from now on, like a camera mode change would.'''
+        self.resolution = (width, height)
+
+    def set_format(self, fourcc):
+        pass  # Recordings are already decoded
+
+    def _next_frame(self, out=None):
+        if self.frame_paths is not None:
+            while True:
+                if self.position >= len(self.frame_paths):
+                    if not self.loop:
+                        return None
+                    self.position = 0
+                path = self.frame_paths[self.position]
+                frame = cv2.imread(path)
+                if frame is not None:
+                    break
+                # Drop it so a looping replay only warns once
+                print(f"Skipping unreadable replay frame: {path}")
+                del self.frame_paths[self.position]
+                if not self.frame_paths:
+                    raise RuntimeError(f"No readable frames in replay directory: {self.source}")
+            if out is not None and out.shape == frame.shape:
+                np.copyto(out, frame)
+                frame = out
+        else:
+            ret, frame = self.cap.read(out)
+            if not ret and self.loop:
+                self.cap.set(cv2.CAP_PROP_POS_FRAMES, 0)
+                ret, frame = self.cap.read(out)
+            if not ret:
+                return None
+        self.position += 1
+        if self.resolution is not None and (frame.shape[1], frame.shape[0]) != self.resolution:
+            scaled = out if out is not None and out.shape[:2] == self.resolution[::-1] else None
+            frame = cv2.resize(frame, self.resolution, dst=scaled, interpolation=cv2.INTER_AREA)
+        self.frame_size = (frame.shape[1], frame.shape[0])
+        return frame
+
+    def read(self, out=None, last_seq=None, timeout=1.0):
+        '''
+        Return (frame, seq, timestamp) for the next recorded frame, sleeping
+        until its scheduled time unless replaying as fast as possible.
+        '''
+        now = time.monotonic()
+        if self.start_time is None:
+            self.start_time = now
+
+        # Schedule against the session start so pacing doesn't drift
+        due = self.start_time + (self.latest_seq - self.base_seq) * self.frame_interval
+        if due > now:
+            time.sleep(due - now)
+
+        frame = self._next_frame(out)
+        if frame is None:
+            raise RuntimeError("Replay finished: no more frames.")
+        self.latest_seq += 1
+        self.last_due = due
+        return frame, self.latest_seq, max(due, now)
+
+    def get_frame(self):
+        frame, _, _ = self.read()
+        return frame
+
+    def release(self):
+        if self.cap is not None:
+            self.cap.release()
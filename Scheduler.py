@@ -0,0 +1,81 @@
+import threading
+import time
+from Instrumentation import LatencyHistogram
+
+class ControlTask:
+    '''A callable run at a fixed rate by ControlScheduler.'''
+
+    def __init__(self, name, rate_hz, fn):
+        self.name = name
+        self.rate_hz = rate_hz
+        self.period = 1.0 / rate_hz
+        self.fn = fn
+        self.deadline = 0.0
+        self.runs = 0
+        self.overruns = 0
+        self.jitter = LatencyHistogram()    # ms late relative to the deadline
+        self.duration = LatencyHistogram()  # ms spent in fn
+
+class ControlScheduler:
+    '''
+    Runs control tasks at fixed rates against absolute deadlines on one
+    thread. Each tick is scheduled from the previous deadline, not from
+    when the last run finished, so the period doesn't drift with task
+    runtime. A task that runs past its next deadline counts an overrun
+    and skips the ticks it missed rather than bursting to catch up.
+    '''
+
+    def __init__(self):
+        self.tasks = []
+        self.stop_event = threading.Event()
+        self.thread = None
+
+    def add_task(self, name, rate_hz, fn):
+        self.tasks.append(ControlTask(name, rate_hz, fn))
+
+    def start(self):
+        self.thread = threading.Thread(target=self.run, name="control", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stop_event.set()
+        if self.thread is not None:
+            self.thread.join(timeout=2.0)
+
+    def run(self):
+        '''Run tasks until stop() is called. Blocks the calling thread.'''
+        start = time.perf_counter()
+        for task in self.tasks:
+            task.deadline = start
+
+        while not self.stop_event.is_set():
+            task = min(self.tasks, key=lambda t: t.deadline)
+            delay = task.deadline - time.perf_counter()
+            if delay > 0 and self.stop_event.wait(delay):
+                break
+
+            began = time.perf_counter()
+            task.jitter.record((began - task.deadline) * 1000)
+            try:
+                task.fn()
+            except Exception as e:
+                print(f"Error in {task.name} task: {e}")
+            finished = time.perf_counter()
+            task.duration.record((finished - began) * 1000)
+            task.runs += 1
+
+            task.deadline += task.period
+            if finished > task.deadline:
+                # Missed one or more ticks; keep the phase, drop the backlog
+                missed = int((finished - task.deadline) / task.period) + 1
+                task.overruns += missed
+                task.deadline += missed * task.period
+
+    def get_stats(self):
+        '''Per task: rate, runs, overruns, and jitter/duration percentiles in ms.'''
+        return {task.name: {"rate_hz": task.rate_hz,
+                            "runs": task.runs,
+                            "overruns": task.overruns,
+                            "jitter": task.jitter.summary(),
+                            "duration": task.duration.summary()}
+                for task in self.tasks}
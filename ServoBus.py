@@ -0,0 +1,119 @@
+import threading
+import time
+
+# PCA9685 register layout: each channel has ON_L, ON_H, OFF_L, OFF_H
+# starting at LED0_ON_L. The Adafruit driver enables register
+# auto-increment when the frequency is set, so consecutive channels can
+# be written in one I2C transaction.
+LED0_ON_L = 0x06
+REGISTERS_PER_CHANNEL = 4
+FULL_ON = 0x1000
+
+class ServoBus:
+    '''
+    Write path for the PCA9685 servo channels that sends as little over
+    I2C as possible. Angles are staged per channel and go out on flush():
+    channels whose pulse hasn't changed are skipped, dirty neighbouring
+    channels are merged into one auto-increment burst, and a channel with
+    a rate limit holds its newest value until its interval has passed.
+
+    Pulse math matches adafruit_motor.servo so values are identical to
+    what servo.Servo(...).angle = x would have written.
+    '''
+
+    def __init__(self, pca, min_pulse=750, max_pulse=2250, actuation_range=180, rate_limits=None):
+        self.device = pca.i2c_device
+        self.actuation_range = actuation_range
+
+        # Same duty computation as adafruit_motor.servo.set_pulse_width_range
+        frequency = pca.frequency
+        self.min_duty = int((min_pulse * frequency) / 1000000 * 0xFFFF)
+        max_duty = int((max_pulse * frequency) / 1000000 * 0xFFFF)
+        self.duty_range = int(max_duty - self.min_duty)
+
+        # channel -> minimum seconds between writes
+        self.min_interval = {channel: 1.0 / hz for channel, hz in (rate_limits or {}).items()}
+
+        self.pending = {}     # channel -> 12-bit OFF count waiting to go out
+        self.written = {}     # channel -> last OFF count sent to the chip
+        self.last_write = {}  # channel -> time.monotonic() of last write
+        self.writes = 0       # I2C transactions issued
+        self.skipped = 0      # Channel updates dropped as unchanged
+        self.lock = threading.Lock()
+
+    def angle_to_counts(self, angle):
+        '''Servo angle in degrees -> PCA9685 12-bit OFF count.'''
+        fraction = max(0.0, min(1.0, angle / self.actuation_range))
+        duty_cycle = self.min_duty + int(fraction * self.duty_range)
+        # PWMChannel.duty_cycle maps 16-bit duty to 12 bits like this
+        return FULL_ON if duty_cycle == 0xFFFF else (duty_cycle + 1) >> 4
+
+    def read_angle(self, channel):
+        '''
+        Read a channel's angle back from the chip, or None if its output
+        is off. Decoded the same way as adafruit_motor.servo.Servo.angle.
+        '''
+        registers = bytearray(REGISTERS_PER_CHANNEL)
+        with self.device as i2c:
+            i2c.write_then_readinto(bytes([LED0_ON_L + REGISTERS_PER_CHANNEL * channel]), registers)
+        on = registers[0] | registers[1] << 8
+        off = registers[2] | registers[3] << 8
+        duty_cycle = 0xFFFF if on == FULL_ON else off << 4
+        if duty_cycle == 0:
+            return None
+        return (duty_cycle - self.min_duty) / self.duty_range * self.actuation_range
+
+    def set_angle(self, channel, angle):
+        '''Stage a new angle for a channel. Sent on the next flush().'''
+        with self.lock:
+            self.pending[channel] = self.angle_to_counts(angle)
+
+    def flush(self, force=False):
+        '''
+        Write every staged channel that changed, one burst per run of
+        consecutive channels. force=True ignores rate limits and resends
+        unchanged values. Returns the number of I2C transactions issued.
+        '''
+        now = time.monotonic()
+        with self.lock:
+            dirty = {}
+            for channel, counts in list(self.pending.items()):
+                if not force and self.written.get(channel) == counts:
+                    self.skipped += 1
+                    del self.pending[channel]
+                elif force or now - self.last_write.get(channel, 0.0) >= self.min_interval.get(channel, 0.0):
+                    dirty[channel] = counts
+                    del self.pending[channel]
+                # Otherwise rate-limited: keep the newest value pending
+
+            bursts = 0
+            for run in _consecutive_runs(sorted(dirty)):
+                self._write_run(run, dirty)
+                bursts += 1
+            for channel, counts in dirty.items():
+                self.written[channel] = counts
+                self.last_write[channel] = now
+            self.writes += bursts
+            return bursts
+
+    def _write_run(self, channels, counts):
+        buffer = bytearray([LED0_ON_L + REGISTERS_PER_CHANNEL * channels[0]])
+        for channel in channels:
+            value = counts[channel]
+            if value == FULL_ON:
+                on, off = FULL_ON, 0
+            else:
+                on, off = 0, value
+            buffer += bytes((on & 0xFF, on >> 8, off & 0xFF, off >> 8))
+        with self.device as i2c:
+            i2c.write(buffer)
+
+def _consecutive_runs(channels):
+    run = []
+    for channel in channels:
+        if run and channel != run[-1] + 1:
+            yield run
+            run = []
+        run.append(channel)
+    if run:
+        yield run
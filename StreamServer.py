@@ -0,0 +1,249 @@
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import cv2
+
+# RFC 6455 handshake constant
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+MJPEG_BOUNDARY = "frame"
+
+INDEX_PAGE = b"""<!DOCTYPE html>
+<html>
+<head><title>Crawler</title></head>
+<body style="font-family: monospace; background: #222; color: #ddd;">
+<img src="/stream.mjpg" style="max-width: 100%;">
+<pre id="telemetry"></pre>
+<script>
+const ws = new WebSocket("ws://" + location.host + "/ws");
+ws.onmessage = (event) => {
+    document.getElementById("telemetry").textContent = JSON.stringify(JSON.parse(event.data), null, 2);
+};
+</script>
+</body>
+</html>
+"""
+
+class FrameEncoder:
+    '''
+    Encodes the latest annotated frame to JPEG once per new frame, on its
+    own thread. Every client is served the same bytes, so the cost doesn't
+    grow with the number of viewers.
+
+    Encoding only runs while someone is watching: clients register with
+    acquire() and leave with release(), and the thread exits when the
+    last one leaves, so an unwatched headless run pays nothing for it.
+    '''
+
+    def __init__(self, source, quality=80, interval=0.01):
+        self.source = source  # Context manager yielding (seq, frame), leased while encoding
+        self.params = [cv2.IMWRITE_JPEG_QUALITY, quality]
+        self.interval = interval
+        self.seq = 0
+        self.jpeg = None
+        self.clients = 0
+        self.frame_ready = threading.Condition()
+        self.running = False
+        self.thread = None
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        with self.frame_ready:
+            self.running = False
+            thread = self.thread
+            self.frame_ready.notify_all()
+        if thread is not None:
+            thread.join(timeout=1.0)
+
+    def acquire(self):
+        '''Register a client that wants frames; starts encoding for the first one.'''
+        with self.frame_ready:
+            self.clients += 1
+            if self.thread is None and self.running:
+                self.thread = threading.Thread(target=self._run, name="jpeg-encoder", daemon=True)
+                self.thread.start()
+
+    def release(self):
+        with self.frame_ready:
+            self.clients -= 1
+            if self.clients == 0:
+                self.jpeg = None  # Don't greet the next viewer with a stale frame
+            self.frame_ready.notify_all()
+
+    def _run(self):
+        last_seq = None
+        while True:
+            with self.frame_ready:
+                if self.clients == 0 or not self.running:
+                    self.thread = None  # Under the lock, so acquire() starts a new one
+                    return
+            with self.source() as (seq, frame):
+                fresh = frame is not None and seq != last_seq
+                if fresh:
+                    ok, encoded = cv2.imencode(".jpg", frame, self.params)
+            if not fresh:
+                time.sleep(self.interval)
+                continue
+            last_seq = seq
+            if not ok:
+                continue
+            with self.frame_ready:
+                self.jpeg = encoded.tobytes()
+                self.seq += 1
+                self.frame_ready.notify_all()
+
+    def wait(self, last_seq, timeout=1.0):
+        '''
+        Block until there is a frame newer than last_seq. Returns (jpeg, seq),
+        or (None, last_seq) on timeout or stop. A client that was busy sending
+        just gets the newest frame; the ones it missed are skipped. Call
+        between acquire() and release().
+        '''
+        with self.frame_ready:
+            self.frame_ready.wait_for(lambda: (self.jpeg is not None and self.seq != last_seq) or not self.running,
+                                      timeout)
+            if self.seq == last_seq or self.jpeg is None:
+                return None, last_seq
+            return self.jpeg, self.seq
+
+class StreamServer:
+    '''
+    Small HTTP server for watching the vehicle without a display:
+
+        /             page with the stream and live telemetry
+        /stream.mjpg  annotated frames as MJPEG
+        /snapshot.jpg latest frame
+        /telemetry    telemetry as JSON
+        /ws           telemetry pushed over a WebSocket
+
+    Each client gets its own thread. MJPEG clients always send the newest
+    encoded frame, so a slow connection drops frames instead of holding
+    anything else up.
+    '''
+
+    def __init__(self, frame_source, telemetry_source, host="0.0.0.0", port=8080,
+                 quality=80, telemetry_rate=5.0):
+        self.encoder = FrameEncoder(frame_source, quality=quality)
+        self.telemetry_source = telemetry_source  # Returns a JSON-serializable dict
+        self.telemetry_interval = 1.0 / telemetry_rate
+        self.httpd = ThreadingHTTPServer((host, port), _make_handler(self))
+        self.httpd.daemon_threads = True
+        self.thread = None
+
+    @property
+    def address(self):
+        return self.httpd.server_address
+
+    def start(self):
+        self.encoder.start()
+        self.thread = threading.Thread(target=self.httpd.serve_forever, name="stream-server", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.encoder.stop()
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def telemetry_json(self):
+        return json.dumps(self.telemetry_source(), default=str).encode()
+
+def _make_handler(server):
+    class StreamHandler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # Browsers won't upgrade a 1.0 response to a WebSocket
+
+        def log_message(self, format, *args):
+            pass  # Don't print a line per request
+
+        def do_GET(self):
+            path = self.path.split("?", 1)[0]
+            if path == "/":
+                self._send_body(INDEX_PAGE, "text/html")
+            elif path == "/stream.mjpg":
+                self._stream_mjpeg()
+            elif path == "/snapshot.jpg":
+                server.encoder.acquire()
+                try:
+                    jpeg, _ = server.encoder.wait(None)
+                finally:
+                    server.encoder.release()
+                if jpeg is None:
+                    self.send_error(503, "No frame yet")
+                else:
+                    self._send_body(jpeg, "image/jpeg")
+            elif path == "/telemetry":
+                self._send_body(server.telemetry_json(), "application/json")
+            elif path == "/ws":
+                self._websocket()
+            else:
+                self.send_error(404)
+
+        def _send_body(self, body, content_type):
+            self.send_response(200)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _stream_mjpeg(self):
+            self.send_response(200)
+            self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.close_connection = True
+            seq = None
+            server.encoder.acquire()
+            try:
+                while server.encoder.running:
+                    jpeg, seq = server.encoder.wait(seq)
+                    if jpeg is None:
+                        continue
+                    self.wfile.write(f"--{MJPEG_BOUNDARY}\r\nContent-Type: image/jpeg\r\n"
+                                     f"Content-Length: {len(jpeg)}\r\n\r\n".encode())
+                    self.wfile.write(jpeg)
+                    self.wfile.write(b"\r\n")
+            except (BrokenPipeError, ConnectionResetError):
+                pass  # Client went away
+            finally:
+                server.encoder.release()
+
+        def _websocket(self):
+            key = self.headers.get("Sec-WebSocket-Key")
+            if key is None or self.headers.get("Upgrade", "").lower() != "websocket":
+                self.send_error(400, "Expected a WebSocket upgrade")
+                return
+            accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+            self.send_response(101)
+            self.send_header("Upgrade", "websocket")
+            self.send_header("Connection", "Upgrade")
+            self.send_header("Sec-WebSocket-Accept", accept)
+            self.end_headers()
+            self.close_connection = True
+
+            # Push only; anything the browser sends (including close) is
+            # noticed as a failed write once it hangs up.
+            try:
+                while server.encoder.running:
+                    self.wfile.write(_websocket_text_frame(server.telemetry_json()))
+                    self.wfile.flush()
+                    time.sleep(server.telemetry_interval)
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    return StreamHandler
+
+def _websocket_text_frame(payload):
+    '''Single unmasked server-to-client text frame.'''
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x81, length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x81, 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x81, 127, length)
+    return header + payload
@@ -0,0 +1,143 @@
+import json
+import os
+import sys
+import threading
+import time
+import numpy as np
+
+MAGIC = b"CRWLTLM1"
+HEADER_ALIGN = 64
+
+# Record sources
+SOURCE_VEHICLE = 0   # VehicleController.get_state() sample
+SOURCE_FOLLOWER = 1  # PersonFollower decision
+
+# One fixed-width record. Fields that don't apply to a source are NaN.
+TELEMETRY_DTYPE = np.dtype([
+    ("time", "<f8"),        # Wall-clock seconds since the epoch
+    ("source", "u1"),
+    ("detected", "u1"),
+    ("frame_seq", "<u4"),
+    ("throttle", "<f4"),
+    ("front_s", "<f4"),
+    ("rear_s", "<f4"),
+    ("pan", "<f4"),
+    ("tilt", "<f4"),
+    ("person_x", "<f4"),
+    ("person_y", "<f4"),
+])
+
+STATE_FIELDS = ("throttle", "front_s", "rear_s", "pan", "tilt")
+
+def _nan_if_none(value):
+    return np.nan if value is None else value
+
+class TelemetryRecorder:
+    '''
+    Appends fixed-width telemetry records to a binary file with a small
+    JSON header. Records are filled into a preallocated block and written
+    out a block at a time, so recording a sample is a few array stores.
+    '''
+
+    def __init__(self, path, block_records=256):
+        self.path = path
+        self.block = np.zeros(block_records, dtype=TELEMETRY_DTYPE)
+        self.count = 0
+        self.lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.file = open(path, "wb")
+        self.file.write(_encode_header({"dtype": TELEMETRY_DTYPE.descr, "start": time.time()}))
+
+    def _next(self, source):
+        record = self.block[self.count]
+        record["time"] = time.time()
+        record["source"] = source
+        return record
+
+    def _commit(self):
+        self.count += 1
+        if self.count == len(self.block):
+            self._write_block()
+
+    def _write_block(self):
+        self.file.write(memoryview(self.block[:self.count]))
+        self.count = 0
+
+    def record_state(self, state):
+        '''Record a VehicleController.get_state() dict.'''
+        with self.lock:
+            record = self._next(SOURCE_VEHICLE)
+            for field in STATE_FIELDS:
+                record[field] = _nan_if_none(state.get(field))
+            record["person_x"] = record["person_y"] = np.nan
+            record["detected"] = 0
+            record["frame_seq"] = 0
+            self._commit()
+
+    def record_decision(self, frame_seq, person_x, person_y, pan, tilt):
+        '''Record what the follower saw in a frame and the pan/tilt it commanded.'''
+        with self.lock:
+            record = self._next(SOURCE_FOLLOWER)
+            record["throttle"] = record["front_s"] = record["rear_s"] = np.nan
+            record["pan"] = _nan_if_none(pan)
+            record["tilt"] = _nan_if_none(tilt)
+            record["person_x"] = _nan_if_none(person_x)
+            record["person_y"] = _nan_if_none(person_y)
+            record["detected"] = person_x is not None
+            record["frame_seq"] = frame_seq or 0
+            self._commit()
+
+    def flush(self):
+        with self.lock:
+            if self.count:
+                self._write_block()
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+def _encode_header(meta):
+    body = json.dumps(meta).encode()
+    size = len(MAGIC) + 4 + len(body)
+    size += -size % HEADER_ALIGN  # Pad so records start aligned
+    header = MAGIC + size.to_bytes(4, "little") + body
+    return header + b" " * (size - len(header))
+
+def read_header(path):
+    '''Return (metadata dict, header size in bytes).'''
+    with open(path, "rb") as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a telemetry file.")
+        size = int.from_bytes(f.read(4), "little")
+        meta = json.loads(f.read(size - len(MAGIC) - 4).decode().rstrip())
+    return meta, size
+
+def load_session(path):
+    '''
+    Memory-map a whole session as a structured array without parsing.
+    A trailing partial record (e.g. after a crash) is ignored.
+    '''
+    meta, offset = read_header(path)
+    dtype = np.dtype([tuple(field) for field in meta["dtype"]])
+    count = (os.path.getsize(path) - offset) // dtype.itemsize
+    if count == 0:
+        return np.zeros(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", offset=offset, shape=(count,))
+
+def export_csv(path, csv_path):
+    '''Write a session out as CSV with a header row.'''
+    records = load_session(path)
+    formats = ["%.6f" if name == "time" else "%d" if records.dtype[name].kind in "ui" else "%.3f"
+               for name in records.dtype.names]
+    np.savetxt(csv_path, records, delimiter=",", fmt=formats,
+               header=",".join(records.dtype.names), comments="")
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print("Usage: python Telemetry.py SESSION.tlm OUTPUT.csv")
+        sys.exit(1)
+    export_csv(sys.argv[1], sys.argv[2])
@@ -1,7 +1,11 @@
 import cv2
+import threading
+import time
+import numpy as np
 
 class USBCamera:
-    def __init__(self, camera_index=0, device_path=None, fps=30):
+    def __init__(self, camera_index=0, device_path=None, fps=30, threaded=False, buffer_count=3,
+                 width=None, height=None, fourcc=None):
         self.camera_index = camera_index
         self.device_path = device_path
         self.fps = fps
@@ -20,15 +24,149 @@ class USBCamera:
         print(f"Camera initialized successfully at {'device path ' + device_path if device_path else 'index ' + str(camera_index)}")
         self.set_fps(fps)
 
+        # Negotiate the capture format (e.g. "MJPG" or "YUYV") and resolution.
+        # frame_size is what the driver actually delivers, which may differ
+        # from what was asked for.
+        self.frame_size = None
+        self.fourcc = None
+        self.settings_lock = threading.Lock()
+        self.pending_settings = {}
+        self._apply_settings(width=width, height=height, fourcc=fourcc)
+
+        # Background capture state (only used when threaded=True)
+        self.threaded = threaded
+        self.buffers = None
+        self.latest_index = -1
+        self.latest_seq = 0
+        self.latest_timestamp = 0.0
+        self.frame_ready = threading.Condition()
+        self.stop_event = threading.Event()
+        self.capture_thread = None
+
+        if threaded:
+            self._start_capture_thread(buffer_count)
+
     def set_fps(self, fps):
         self.fps = fps
         self.cap.set(cv2.CAP_PROP_FPS, fps)
 
+    def set_resolution(self, width, height):
+        '''
+        Ask the driver for a new capture resolution. In threaded mode the
+        capture thread applies it between frames and this returns at once;
+        watch frame_size (or the frames) for the result.
+        '''
+        self._request_settings(width=width, height=height)
+
+    def set_format(self, fourcc):
+        '''Ask for a pixel format by FOURCC: "MJPG" (compressed, high res at full rate) or "YUYV" (raw).'''
+        self._request_settings(fourcc=fourcc)
+
+    def _request_settings(self, **settings):
+        if not self.threaded:
+            self._apply_settings(**settings)
+            return
+        with self.settings_lock:
+            self.pending_settings.update(settings)
+
+    def _apply_settings(self, width=None, height=None, fourcc=None):
+        # The format goes first: V4L2 only offers some resolutions in MJPG
+        if fourcc is not None:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
+        if width is not None and height is not None:
+            self.cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+            self.cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+        if fourcc is not None or width is not None:
+            self.cap.set(cv2.CAP_PROP_FPS, self.fps)  # Some drivers reset it on a mode change
+
+        self.frame_size = (int(self.cap.get(cv2.CAP_PROP_FRAME_WIDTH)), int(self.cap.get(cv2.CAP_PROP_FRAME_HEIGHT)))
+        code = int(self.cap.get(cv2.CAP_PROP_FOURCC))
+        self.fourcc = "".join(chr((code >> 8 * i) & 0xFF) for i in range(4)) if code else None
+        print(f"Camera delivering {self.frame_size[0]}x{self.frame_size[1]} {self.fourcc or ''}".rstrip())
+
+    def _start_capture_thread(self, buffer_count):
+        '''Allocate the frame ring and start the grabber thread.'''
+        if buffer_count < 2:
+            raise ValueError("buffer_count must be at least 2")
+
+        # Size the ring from a real frame so retrieve() can decode in place
+        ret, frame = self.cap.read()
+        if not ret:
+            raise RuntimeError("Failed to capture frame from USB camera.")
+        self.buffers = [np.empty_like(frame) for _ in range(buffer_count)]
+        self._publish(0, frame, time.monotonic())
+
+        self.capture_thread = threading.Thread(target=self._run_capture, daemon=True)
+        self.capture_thread.start()
+
+    def _publish(self, index, frame, timestamp):
+        '''Make ring slot `index` the newest frame.'''
+        with self.frame_ready:
+            if frame.shape != self.buffers[index].shape:
+                # Resolution changed (requested or by the driver); resize the ring
+                self.buffers = [np.empty_like(frame) for _ in self.buffers]
+                self.frame_size = (frame.shape[1], frame.shape[0])
+            if frame is not self.buffers[index]:
+                np.copyto(self.buffers[index], frame)
+            self.latest_index = index
+            self.latest_seq += 1
+            self.latest_timestamp = timestamp
+            self.frame_ready.notify_all()
+
+    def _run_capture(self):
+        while not self.stop_event.is_set():
+            if self.pending_settings:
+                with self.settings_lock:
+                    settings, self.pending_settings = self.pending_settings, {}
+                self._apply_settings(**settings)
+            if not self.cap.grab():
+                time.sleep(0.005)
+                continue
+            timestamp = time.monotonic()
+
+            # Never write into the slot readers are copying from
+            index = (self.latest_index + 1) % len(self.buffers)
+            ret, frame = self.cap.retrieve(self.buffers[index])
+            if not ret:
+                continue
+            self._publish(index, frame, timestamp)
+
+    def read(self, out=None, last_seq=None, timeout=1.0):
+        '''
+        Return (frame, seq, timestamp) for the newest captured frame.
+        If last_seq is given, wait until a frame newer than it arrives so
+        stale frames are never handed out twice. If out is given, the frame
+        is copied into it instead of allocating a new array.
+        '''
+        if not self.threaded:
+            ret, frame = self.cap.read(out)
+            if not ret:
+                raise RuntimeError("Failed to capture frame from USB camera.")
+            self.latest_seq += 1
+            return frame, self.latest_seq, time.monotonic()
+
+        with self.frame_ready:
+            if last_seq is not None and self.latest_seq <= last_seq:
+                if not self.frame_ready.wait_for(lambda: self.latest_seq > last_seq, timeout):
+                    raise RuntimeError("Timed out waiting for a new frame from USB camera.")
+            source = self.buffers[self.latest_index]
+            if out is None or out.shape != source.shape:
+                out = source.copy()
+            else:
+                np.copyto(out, source)
+            return out, self.latest_seq, self.latest_timestamp
+
     def get_frame(self):
+        if self.threaded:
+            frame, _, _ = self.read()
+            return frame
         ret, frame = self.cap.read()
         if not ret:
             raise RuntimeError("Failed to capture frame from USB camera.")
         return frame
 
     def release(self):
-        self.cap.release()
\ No newline at end of file
+        self.stop_event.set()
+        if self.capture_thread is not None:
+            self.capture_thread.join(timeout=1.0)
+        self.cap.release()
@@ -1,10 +1,7 @@
-import pigpio
-import board
-import busio
-from adafruit_pca9685 import PCA9685
-from adafruit_motor import servo
 from typing import Tuple
 import Logger
+from ServoBus import ServoBus
+from HardwareBackends import create_backends
 
 # Constants for control of the Quicrun 880 ESC
 ESC_GPIO_PIN = 18
@@ -26,57 +23,69 @@ class VehicleController:
     expect values between -1 and 1, where 0 is neutral.
     '''
 
-    def __init__(self, logger: Logger.Logger) -> None:
+    def __init__(self, logger: Logger.Logger, coalesce_writes: bool = False, servo_rate_limits: dict = None,
+                 backend: str = "hardware") -> None:
         self.logger = logger
-        # Setup pigpio for ESC control
-        self.pi = pigpio.pi()
-        if not self.pi.connected:
-            raise RuntimeError("pigpio daemon not running")
-        self.pi.set_mode(ESC_GPIO_PIN, pigpio.OUTPUT)
-
-        # Setup I2C and PCA9685
-        self.i2c = busio.I2C(board.SCL, board.SDA)
-        self.pca = PCA9685(self.i2c)
-        self.pca.frequency = SERVO_FREQ
-
-        # Initialize servos
-        self.pan_servo = servo.Servo(self.pca.channels[PAN_CHANNEL], actuation_range=180)
-        self.tilt_servo = servo.Servo(self.pca.channels[TILT_CHANNEL], actuation_range=180)
-        self.front_steering_servo = servo.Servo(self.pca.channels[FRONT_STEERING_CHANNEL], actuation_range=180)
-        self.rear_steering_servo = servo.Servo(self.pca.channels[REAR_STEERING_CHANNEL], actuation_range=180)
+
+        # ESC (pigpio) and PCA9685 (I2C). backend="sim" swaps in simulated
+        # devices that record commands and model bus latency, so the control
+        # path runs on any Linux box.
+        self.backend = backend
+        self.esc, self.pca = create_backends(backend, ESC_GPIO_PIN, SERVO_FREQ)
+
+        # Servo writes go through the bus so unchanged pulses are skipped and
+        # neighbouring channels share one I2C burst. With coalesce_writes the
+        # set_* methods only stage values and flush() sends them, once per
+        # control tick. servo_rate_limits maps channel -> max writes/second.
+        self.servo_bus = ServoBus(self.pca, actuation_range=180, rate_limits=servo_rate_limits)
+        self.coalesce_writes = coalesce_writes
+
+        # Shadow of the last commanded state, kept by every set_ call
+        self.state = {"throttle": None, "front_s": None, "rear_s": None, "pan": None, "tilt": None}
 
     def get_state(self) -> dict:
         ''' 
-        Get the current state of the ESC and servos.
-        Returns a tuple of (throttle, front_steering, rear_steering, pan, tilt).
+        Get the commanded state of the ESC and servos.
+        Returns a dict of throttle (pulse width) and front_s, rear_s,
+        pan, tilt (degrees). This is an in-memory snapshot updated by
+        every set_ call, so it's free to poll; values are None until
+        first commanded. Use check_consistency() to compare with hardware.
+        '''
+
+        return dict(self.state)
+
+    def read_hardware_state(self) -> dict:
+        ''' 
+        Read the ESC pulse width and servo angles back from pigpio and
+        the PCA9685. Slow (one bus read per value); for consistency checks.
         '''
 
         try:
-            throttle = self.pi.get_servo_pulsewidth(ESC_GPIO_PIN)
+            throttle = self.esc.get_pulsewidth()
         except Exception as e:
             self.logger.log("error", "Error reading state", f"Error reading throttle: {e}")
             throttle = None
 
         try:
-            front_steering = self.front_steering_servo.angle
+            front_steering = self.servo_bus.read_angle(FRONT_STEERING_CHANNEL)
         except Exception as e:
             self.logger.log("error", "Error reading state", f"Error reading front steering: {e}")
             front_steering = None
 
         try:
-            rear_steering = self.rear_steering_servo.angle
+            rear_steering = self.servo_bus.read_angle(REAR_STEERING_CHANNEL)
         except Exception as e:
             self.logger.log("error", "Error reading state", f"Error reading rear steering: {e}")
             rear_steering = None
 
         try:
-            pan = self.pan_servo.angle
+            pan = self.servo_bus.read_angle(PAN_CHANNEL)
         except Exception as e:
             self.logger.log("error", "Error reading state", f"Error reading pan angle: {e}")
             pan = None
 
         try:
-            tilt = self.tilt_servo.angle
+            tilt = self.servo_bus.read_angle(TILT_CHANNEL)
         except Exception as e:
             self.logger.log("error", "Error reading state", f"Error reading tilt angle: {e}")
             tilt = None
@@ -86,7 +95,35 @@ class VehicleController:
                 "rear_s": rear_steering,
                 "pan": pan,
                 "tilt": tilt}
-    
+
+    def check_consistency(self, angle_tolerance: float = 1.0) -> dict:
+        ''' 
+        Compare the shadow state with a hardware read-back and log any
+        mismatch. Angles read back through 12-bit PWM, so they're only
+        compared within angle_tolerance degrees. Staged writes that haven't
+        been flushed yet will show up as mismatches, so call after flush().
+        Returns {name: (commanded, actual)} for each mismatch.
+        '''
+
+        commanded = self.get_state()
+        actual = self.read_hardware_state()
+        mismatches = {}
+        for name, expected in commanded.items():
+            value = actual[name]
+            if expected is None or value is None:
+                continue
+            tolerance = 0 if name == "throttle" else angle_tolerance
+            if abs(value - expected) > tolerance:
+                mismatches[name] = (expected, value)
+
+        if mismatches:
+            self.logger.log("warning", "State mismatch", f"Commanded vs hardware: {mismatches}")
+        return mismatches
+
+    def _update_state(self, **values) -> None:
+        # Swap in a new dict so readers never see a half-applied update
+        self.state = {**self.state, **values}
+
     def set_throttle(self, value) -> int:
         ''' 
         Set the throttle for the ESC.
@@ -101,7 +138,8 @@ class VehicleController:
             pulse = int(ESC_NEUTRAL_PW - abs(value) * (ESC_NEUTRAL_PW - ESC_FULL_REVERSE_PW))
         else:
             pulse = ESC_NEUTRAL_PW
-        self.pi.set_servo_pulsewidth(ESC_GPIO_PIN, pulse)
+        self.esc.set_pulsewidth(pulse)
+        self._update_state(throttle=pulse)
         return pulse
     
     def set_steering(self, front, rear) -> Tuple[int, int]:
@@ -117,9 +155,12 @@ class VehicleController:
         front_angle = int((front + 1.0) * 90)
         rear_angle = int((rear + 1.0) * 90)
         
-        self.front_steering_servo.angle = front_angle
-        self.rear_steering_servo.angle = rear_angle
-        
+        self.servo_bus.set_angle(FRONT_STEERING_CHANNEL, front_angle)
+        self.servo_bus.set_angle(REAR_STEERING_CHANNEL, rear_angle)
+        self._update_state(front_s=front_angle, rear_s=rear_angle)
+        if not self.coalesce_writes:
+            self.servo_bus.flush()
+
         return front_angle, rear_angle
     
     def set_pan_tilt(self, pan, tilt) -> Tuple[int, int]:
@@ -135,21 +176,32 @@ class VehicleController:
         pan_angle = int((pan + 1.0) * 90)
         tilt_angle = int((1.0 - tilt) * 90)
         
-        self.pan_servo.angle = pan_angle
-        self.tilt_servo.angle = tilt_angle
-        
+        self.servo_bus.set_angle(PAN_CHANNEL, pan_angle)
+        self.servo_bus.set_angle(TILT_CHANNEL, tilt_angle)
+        self._update_state(pan=pan_angle, tilt=tilt_angle)
+        if not self.coalesce_writes:
+            self.servo_bus.flush()
+
         return pan_angle, tilt_angle
     
+    def flush(self) -> int:
+        ''' 
+        Send staged servo changes in as few I2C bursts as possible.
+        Call once per control tick when coalesce_writes is enabled.
+        '''
+
+        return self.servo_bus.flush()
+
     def return_neutral(self) -> None:
         ''' 
         Set the ESC and servos to neutral position.
         '''
 
-        self.pi.set_servo_pulsewidth(ESC_GPIO_PIN, ESC_NEUTRAL_PW)
-        self.pan_servo.angle = 90
-        self.tilt_servo.angle = 90
-        self.front_steering_servo.angle = 90
-        self.rear_steering_servo.angle = 90
+        self.esc.set_pulsewidth(ESC_NEUTRAL_PW)
+        for channel in (PAN_CHANNEL, TILT_CHANNEL, FRONT_STEERING_CHANNEL, REAR_STEERING_CHANNEL):
+            self.servo_bus.set_angle(channel, 90)
+        self.servo_bus.flush(force=True)
+        self._update_state(throttle=ESC_NEUTRAL_PW, front_s=90, rear_s=90, pan=90, tilt=90)
     
     def close(self) -> None:
         ''' 
@@ -157,8 +209,6 @@ class VehicleController:
         '''
     
         self.return_neutral()
-        self.pi.set_servo_pulsewidth(ESC_GPIO_PIN, 0)
-        self.pi.stop()
+        self.esc.close()
         self.pca.deinit()
-        self.i2c.deinit()
 
@@ -0,0 +1,279 @@
+import argparse
+import json
+import os
+import platform
+import resource
+import sys
+import tempfile
+import time
+import cv2
+import numpy as np
+import Logger as lg
+import VehicleController as vc
+import PersonFollower as pf
+from Preprocessor import Preprocessor
+from MotionGate import MotionGate
+from PersonDetector import MoveNetDetector, PersonTracker, draw_detection
+from PoseEstimation import draw_poses
+from Instrumentation import LatencyHistogram
+from InferenceEngine import warm_up
+from ReplayCamera import ReplayCamera
+
+# Metrics compared against the baseline, and which direction is worse
+COMPARED_METRICS = {"p50": "higher", "p95": "higher", "fps": "lower"}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Benchmark the perception and control hot paths")
+    parser.add_argument("--frames", metavar="PATH",
+                        help="recorded session (video file or frame directory); synthetic frames if omitted")
+    parser.add_argument("--num-frames", type=int, default=100, help="frames to take from the recording")
+    parser.add_argument("--iterations", type=int, default=200, help="timed calls per benchmark")
+    parser.add_argument("--engines", nargs="+", choices=["tflite", "keras"], default=["tflite"],
+                        help="inference backends to time (ones that can't load are skipped)")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads")
+    parser.add_argument("--only", nargs="+", metavar="PREFIX",
+                        help="run only benchmarks whose name starts with one of these")
+    parser.add_argument("--output", default="benchmark.json", help="where to write the JSON results")
+    parser.add_argument("--baseline", metavar="PATH", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15,
+                        help="allowed relative regression in p50 latency and FPS")
+    parser.add_argument("--tail-threshold", type=float, default=0.30,
+                        help="allowed relative regression in p95 latency")
+    parser.add_argument("--rss-threshold", type=float, default=0.20,
+                        help="allowed relative growth in peak RSS")
+    parser.add_argument("--min-delta-ms", type=float, default=0.05,
+                        help="ignore latency changes smaller than this; microsecond benchmarks are mostly noise")
+    return parser.parse_args()
+
+def load_frames(path, count):
+    '''Up to `count` BGR frames from a recording.'''
+    camera = ReplayCamera(path, mode="fast")
+    frames = []
+    try:
+        while len(frames) < count:
+            frames.append(camera.get_frame().copy())
+    except RuntimeError:
+        pass  # Recording ran out before `count` frames
+    finally:
+        camera.release()
+    return frames
+
+def synthetic_frames(count, width=320, height=240):
+    '''A textured scene panning a couple of pixels per frame, so tracking has something to follow.'''
+    rng = np.random.default_rng(0)
+    scene = cv2.GaussianBlur(rng.integers(0, 256, (height, width * 2, 3), dtype=np.uint8), (5, 5), 0)
+    return [np.ascontiguousarray(scene[:, 2 * i % width:2 * i % width + width]) for i in range(count)]
+
+def peak_rss_mb():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+def time_calls(fn, iterations, warmup=3):
+    '''Call fn(i) and return the latency summary (ms) plus calls per second.'''
+    for i in range(warmup):
+        fn(i)
+    histogram = LatencyHistogram(window=iterations)
+    started = time.perf_counter()
+    for i in range(iterations):
+        began = time.perf_counter()
+        fn(i)
+        histogram.record((time.perf_counter() - began) * 1000)
+    elapsed = time.perf_counter() - started
+    result = histogram.summary()
+    result["fps"] = iterations / elapsed if elapsed > 0 else 0.0
+    return result
+
+class MovingPeople:
+    '''Fake MoveNet output: six candidate rows, two people above threshold, drifting a little each call.'''
+
+    def __init__(self):
+        self.output = np.zeros((6, 56), dtype=np.float32)
+        self.output[:, 51:55] = (0.2, 0.3, 0.8, 0.6)  # ymin, xmin, ymax, xmax
+        self.output[:2, 55] = (0.9, 0.6)
+        self.output[2:, 55] = 0.05
+
+    def __call__(self, i):
+        self.output[:, 51:55] += 0.001 * np.sin(i)
+        return self.output
+
+# === Benchmarks ===
+# Each yields (name, fn(i)) pairs, or (name, reason) to record a skip.
+
+def preprocess_benchmarks(frames):
+    for name, shape, dtype, normalize in (("preprocess.classify", (1, 128, 128, 3), np.float32, True),
+                                          ("preprocess.detect", (1, 256, 256, 3), np.uint8, False)):
+        preprocessor = Preprocessor(shape, dtype=dtype, normalize=normalize)
+        yield name, lambda i, p=preprocessor: p(frames[i % len(frames)])
+
+    gate = MotionGate(refresh_interval=float("inf"))
+    yield "preprocess.motion_gate", lambda i: gate.should_run(frames[i % len(frames)])
+
+def inference_benchmarks(frames, engines, threads):
+    for localization in ("classify", "detect"):
+        for kind in engines:
+            name = f"inference.{localization}.{kind}"
+            try:
+                # No Keras fallback: each backend is measured on its own
+                if kind == "tflite":
+                    path = pf.MOVENET_TFLITE_PATH if localization == "detect" else pf.TFLITE_MODEL_PATH
+                    input_shape = (None, 256, 256, 3) if localization == "detect" else None
+                    from InferenceEngine import TFLiteEngine
+                    engine = TFLiteEngine(path, num_threads=threads, input_shape=input_shape)
+                else:
+                    engine = pf.build_engine(localization, kind)
+                warm_up(engine)
+            except Exception as e:
+                yield name, f"engine unavailable: {e}"
+                continue
+            preprocessor = Preprocessor(engine.input_shape, dtype=engine.input_dtype,
+                                        quantization=engine.input_quantization,
+                                        normalize=localization == "classify", out=engine.input_buffer)
+            preprocessor(frames[0])
+            yield name, lambda i, e=engine: e.predict(e.input_buffer)
+
+            if localization == "detect":
+                detector = MoveNetDetector(engine)
+                yield f"frame.detect.{kind}", lambda i, d=detector: d.detect(frames[i % len(frames)])
+
+def postprocess_benchmarks(frames):
+    class DecodeOnlyEngine:
+        # Enough of an engine for MoveNetDetector to build its preprocessor
+        input_shape, input_dtype = (1, 256, 256, 3), np.uint8
+        input_buffer = np.zeros(input_shape, dtype=input_dtype)
+
+    detector = MoveNetDetector(DecodeOnlyEngine())
+    people = MovingPeople()
+    height, width = frames[0].shape[:2]
+    yield "postprocess.movenet_decode", lambda i: detector.decode(people(i), width, height)
+
+    tracker = PersonTracker("flow")
+    box = np.array([width * 0.3, height * 0.2, width * 0.6, height * 0.8])
+
+    def track(i):
+        if i % 10 == 0:
+            tracker.init(frames[i % len(frames)], box)
+        else:
+            tracker.update(frames[i % len(frames)])
+    yield "postprocess.track_flow", track
+
+    canvas = frames[0].copy()
+    yield "postprocess.overlay", lambda i: draw_detection(canvas, box, f"person track ({0.87:.2f})")
+
+    def pose_overlay(i):
+        detector.decode(people(i), width, height)
+        draw_poses(canvas, detector.poses)
+    yield "postprocess.pose_overlay", pose_overlay
+
+def vehicle_benchmarks(log):
+    vecon = vc.VehicleController(log, coalesce_writes=True, backend="sim")
+    values = np.sin(np.linspace(0, 2 * np.pi, 64))
+    yield "vehicle.set_throttle", lambda i: vecon.set_throttle(values[i % 64] * 0.3)
+    yield "vehicle.set_steering", lambda i: vecon.set_steering(values[i % 64], -values[i % 64])
+    yield "vehicle.set_pan_tilt", lambda i: vecon.set_pan_tilt(values[i % 64], values[(i + 16) % 64])
+
+    def control_tick(i):
+        # One tick of the control loop: stage everything, then one flush
+        vecon.set_steering(values[i % 64], -values[i % 64])
+        vecon.set_pan_tilt(values[(i + 8) % 64], values[(i + 16) % 64])
+        vecon.flush()
+    yield "vehicle.control_tick", control_tick
+
+def logger_benchmarks(log, log_dir):
+    state = {"throttle": 1575, "front_s": 90, "rear_s": 90, "pan": 90, "tilt": 90}
+    csv_path = os.path.join(log_dir, "state.csv")
+    yield "logger.log", lambda i: log.log("info", "Benchmark", f"message {i}")
+    yield "logger.csv", lambda i: log.csv(csv_path, "Benchmark", state)
+
+def run_benchmarks(args, frames):
+    log_dir = tempfile.mkdtemp(prefix="crawler-bench-")
+    log = lg.Logger(log_file=os.path.join(log_dir, "app.log"), queued=True, console_rate=0.0)
+    groups = [
+        lambda: preprocess_benchmarks(frames),
+        lambda: inference_benchmarks(frames, args.engines, args.threads),
+        lambda: postprocess_benchmarks(frames),
+        lambda: vehicle_benchmarks(log),
+        lambda: logger_benchmarks(log, log_dir),
+    ]
+
+    results = {}
+    for group in groups:
+        for name, fn in group():
+            if args.only and not any(name.startswith(prefix) for prefix in args.only):
+                continue
+            if isinstance(fn, str):
+                print(f"{name:<32}skipped ({fn})")
+                results[name] = {"skipped": fn}
+                continue
+            result = time_calls(fn, args.iterations)
+            result["peak_rss_mb"] = peak_rss_mb()
+            results[name] = result
+            print(f"{name:<32}{result['p50']:>9.3f}{result['p95']:>9.3f}{result['p99']:>9.3f}{result['fps']:>11.1f}")
+
+    start = time.perf_counter()
+    log.close()  # Include draining the logger's queue in its throughput
+    if "logger.log" in results:
+        results["logger.log"]["drain_ms"] = (time.perf_counter() - start) * 1000
+    return results
+
+def compare(results, baseline, args):
+    '''Return a list of regression messages against the baseline.'''
+    regressions = []
+    thresholds = {"p50": args.threshold, "p95": args.tail_threshold, "fps": args.threshold}
+    for name, result in results["benchmarks"].items():
+        previous = baseline["benchmarks"].get(name)
+        if previous is None or "skipped" in result or "skipped" in previous:
+            continue
+        for metric, worse in COMPARED_METRICS.items():
+            if metric not in result or not previous.get(metric):
+                continue
+            change = (result[metric] - previous[metric]) / previous[metric]
+            # FPS is compared as time per call for the noise floor
+            before, after = (previous[metric], result[metric]) if metric != "fps" else \
+                (1000 / previous[metric], 1000 / max(result[metric], 1e-9))
+            if abs(after - before) < args.min_delta_ms:
+                continue
+            if (change > thresholds[metric]) if worse == "higher" else (-change > thresholds[metric]):
+                regressions.append(f"{name} {metric}: {previous[metric]:.3f} -> {result[metric]:.3f} ({change:+.0%})")
+
+    growth = (results["peak_rss_mb"] - baseline["peak_rss_mb"]) / baseline["peak_rss_mb"]
+    if growth > args.rss_threshold:
+        regressions.append(f"peak RSS: {baseline['peak_rss_mb']:.1f} -> {results['peak_rss_mb']:.1f} MB ({growth:+.0%})")
+    return regressions
+
+def main():
+    args = parse_args()
+    frames = load_frames(args.frames, args.num_frames) if args.frames else []
+    source = args.frames
+    if not frames:
+        frames = synthetic_frames(args.num_frames)
+        source = "synthetic"
+    print(f"{len(frames)} frames ({source}), {frames[0].shape[1]}x{frames[0].shape[0]}")
+    print(f"{'benchmark':<32}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'calls/s':>11}")
+
+    results = {
+        "meta": {"time": time.strftime("%Y-%m-%dT%H:%M:%S"), "python": platform.python_version(),
+                 "machine": platform.machine(), "cpus": os.cpu_count(), "opencv": cv2.__version__,
+                 "frames": source, "iterations": args.iterations},
+        "benchmarks": run_benchmarks(args, frames),
+        "peak_rss_mb": peak_rss_mb(),
+    }
+    print(f"peak RSS {results['peak_rss_mb']:.1f} MB")
+
+    with open(args.output, "w") as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) against {args.baseline}:")
+            for regression in regressions:
+                print("  " + regression)
+            exit(1)
+        print(f"No regressions against {args.baseline}.")
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,153 @@
 import cv2
 import numpy as np
 import tensorflow as tf
-from tflite_runtime.interpreter import Interpreter
+import argparse
 import os
+import time
 import logging
+from ReplayCamera import ReplayCamera
+from InferenceEngine import TFLiteEngine
+
+# Output file per variant. The float model keeps the original name so
+# PersonFollower's default TFLITE_MODEL_PATH still points at it.
+VARIANT_FILES = {
+    "float": "model.tflite",
+    "dynamic": "model_dynamic.tflite",
+    "float16": "model_float16.tflite",
+    "int8": "model_int8.tflite",
+}
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Convert the SavedModel to TFLite with optional post-training quantization")
+    parser.add_argument("--saved-model", default="./", help="directory containing saved_model.pb")
+    parser.add_argument("--output-dir", default="./", help="where to write the .tflite variants")
+    parser.add_argument("--variants", nargs="+", choices=list(VARIANT_FILES), default=list(VARIANT_FILES),
+                        help="which variants to build and compare")
+    parser.add_argument("--frames", metavar="PATH",
+                        help="recorded session (video file or frame directory) for calibration and evaluation")
+    parser.add_argument("--num-frames", type=int, default=200, help="frames to take from the recording")
+    parser.add_argument("--input-size", type=int, default=128, help="model input height and width")
+    parser.add_argument("--runs", type=int, default=50, help="timed invocations per variant when no frames are given")
+    parser.add_argument("--threads", type=int, default=None, help="interpreter threads for the report")
+    parser.add_argument("--select-tf-ops", action="store_true",
+                        help="allow TensorFlow Select ops in the float model (pulls in the Flex delegate)")
+    parser.add_argument("--force", action="store_true", help="rebuild variants that already exist")
+    return parser.parse_args()
+
+def load_frames(path, count, size):
+    '''Read up to `count` frames from a recording as float32 RGB in [0,1].'''
+    camera = ReplayCamera(path, mode="fast")
+    frames = []
+    try:
+        while len(frames) < count:
+            frame = camera.get_frame()
+            frame = cv2.resize(frame, (size, size), interpolation=cv2.INTER_AREA)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+            frames.append(frame.astype(np.float32)[np.newaxis] / 255.0)
+    except RuntimeError:
+        pass  # Recording ran out before `count` frames
+    finally:
+        camera.release()
+    print(f"Loaded {len(frames)} frames from {path}")
+    return frames
+
+def build_converter(saved_model, variant, frames, select_tf_ops):
+    converter = tf.lite.TFLiteConverter.from_saved_model(saved_model)
+
+    if variant == "float":
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS]
+        if select_tf_ops:
+            # Enable TensorFlow Select for unsupported ops
+            converter.target_spec.supported_ops.append(tf.lite.OpsSet.SELECT_TF_OPS)
+    elif variant == "dynamic":
+        # Weights to int8, activations stay float
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+    elif variant == "float16":
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.target_spec.supported_types = [tf.float16]
+    elif variant == "int8":
+        if not frames:
+            raise ValueError("Full-integer quantization needs --frames for the representative dataset.")
+
+        def representative_dataset():
+            for frame in frames:
+                yield [frame]
+
+        # Integer-only kernels, with uint8 I/O so camera pixels feed straight in
+        converter.optimizations = [tf.lite.Optimize.DEFAULT]
+        converter.representative_dataset = representative_dataset
+        converter.target_spec.supported_ops = [tf.lite.OpsSet.TFLITE_BUILTINS_INT8]
+        converter.inference_input_type = tf.uint8
+        converter.inference_output_type = tf.uint8
+    return converter
+
+def convert(args, variant, frames):
+    tflite_model_path = os.path.join(args.output_dir, VARIANT_FILES[variant])
+    if os.path.exists(tflite_model_path) and os.path.getsize(tflite_model_path) > 0 and not args.force:
+        print(f"{tflite_model_path} already exists; skipping conversion (use --force to rebuild).")
+        return tflite_model_path
+
+    print(f"Starting TFLite conversion ({variant})...")
+    try:
+        tflite_model = build_converter(args.saved_model, variant, frames, args.select_tf_ops).convert()
+    except Exception as e:
+        print(f"Error during TFLite conversion ({variant}):", e)
+        logging.exception("Exception occurred during TFLite conversion")
+        return None
+
+    with open(tflite_model_path, "wb") as f:
+        f.write(tflite_model)
+    print(f"{tflite_model_path} created successfully.")
+    return tflite_model_path
+
+def evaluate(model_path, frames, runs, threads):
+    '''Return (latencies in ms, top-1 predictions) for one variant.'''
+    engine = TFLiteEngine(model_path, num_threads=threads)
+    inputs = frames or [np.zeros((1,) + engine.input_shape[1:], dtype=np.float32)] * runs
+
+    engine.predict(inputs[0])  # Warm-up; first invoke sets up kernels
+    latencies = []
+    predictions = []
+    for batch in inputs:
+        start = time.perf_counter()
+        output = engine.predict(batch)
+        latencies.append((time.perf_counter() - start) * 1000)
+        predictions.append(int(np.argmax(output[0])))
+    return np.array(latencies), np.array(predictions)
+
+def print_report(results):
+    reference = results.get("float")
+    print()
+    print(f"{'variant':<10}{'size MB':>10}{'p50 ms':>10}{'p95 ms':>10}{'top-1 agree':>14}")
+    for variant, (path, latencies, predictions) in results.items():
+        size_mb = os.path.getsize(path) / (1024 * 1024)
+        p50, p95 = np.percentile(latencies, [50, 95])
+        if reference is not None and len(reference[2]) == len(predictions) and predictions.size:
+            agreement = f"{np.mean(predictions == reference[2]) * 100:.1f}%"
+        else:
+            agreement = "n/a"
+        print(f"{variant:<10}{size_mb:>10.2f}{p50:>10.2f}{p95:>10.2f}{agreement:>14}")
 
 def main():
-    pb_model_path = "./"
-    tflite_model_path = "./model.tflite"
-
-    # Enable TensorFlow Select for unsupported ops
-    converter = tf.lite.TFLiteConverter.from_saved_model(pb_model_path)
-    converter.target_spec.supported_ops = [
-        tf.lite.OpsSet.TFLITE_BUILTINS,  # Enable TensorFlow Lite ops
-        tf.lite.OpsSet.SELECT_TF_OPS     # Enable TensorFlow Select ops
-    ]
-
-    # Debugging the TFLite conversion process
-    if not os.path.exists(tflite_model_path) or os.path.getsize(tflite_model_path) == 0:
-        print("The .tflite file is missing or empty. Attempting to create it from the .pb file...")
-        try:
-            print("Starting TFLite conversion with TensorFlow Select enabled...")
-            tflite_model = converter.convert()
-            with open(tflite_model_path, "wb") as f:
-                f.write(tflite_model)
-            print(".tflite file created successfully.")
-        except Exception as e:
-            print("Error during TFLite conversion:", e)
-            logging.exception("Exception occurred during TFLite conversion")
-            exit(1)
+    args = parse_args()
+    frames = load_frames(args.frames, args.num_frames, args.input_size) if args.frames else []
+    if not frames:
+        print("No recorded frames given: int8 is skipped and top-1 agreement can't be measured.")
+
+    results = {}
+    for variant in args.variants:
+        if variant == "int8" and not frames:
+            continue
+        path = convert(args, variant, frames)
+        if path is None:
+            continue
+        latencies, predictions = evaluate(path, frames, args.runs, args.threads)
+        # Agreement is only meaningful against real frames
+        results[variant] = (path, latencies, predictions if frames else np.array([]))
+
+    if not results:
+        exit(1)
+    print_report(results)
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,77 +1,250 @@
-from PyQt5.QtWidgets import QApplication
+import time
+STARTED = time.perf_counter()  # Before the imports, for --profile-startup
+
 import sys
-import asyncio
+import argparse
 import threading
+from concurrent.futures import ThreadPoolExecutor
 import VehicleController as vc
-import Joystick as js
 import Logger as lg
-import USBCamera as uc
-import Dashboard as db
-import pygame
 import PersonFollower as pf
-
-# === Main Control Loop ===
-async def control_loop(joystick: js.Joystick, vecon: vc.VehicleController, person_follower: pf.PersonFollower):
-        # await asyncio.sleep(1)  # Allow time for joystick to initialize
-
-        vehicle_state = None
-        # frame_counter = 0  # Counter to throttle console output
+import Telemetry as tm
+import HardwareBackends as hb
+import Scheduler as sc
+from InferenceEngine import warm_up
+from PersonDetector import cv_tracker_factory
+from Instrumentation import StartupProfile
+from datetime import datetime
+
+# Heavy or mode-specific modules (TensorFlow, PyQt5, pygame, the camera
+# classes, the stream server) are imported where they're used, so a run
+# only pays for what it needs.
+
+# === Control Tasks ===
+# Each task runs at a fixed rate on the ControlScheduler thread. Person
+# following runs on PersonFollower's own pipeline threads; its pan/tilt
+# commands are staged and go out with the actuation task's flush.
+def build_scheduler(joystick, vecon: vc.VehicleController, person_follower: pf.PersonFollower,
+                    telemetry: tm.TelemetryRecorder, log: lg.Logger, drive: bool, governor=None,
+                    readback: bool = False) -> sc.ControlScheduler:
+    scheduler = sc.ControlScheduler()
+    vehicle_state = {}
+
+    def read_joystick():
+        # Reads the joystick thread's latest snapshot; never touches pygame.
+        # Throttle and steering read neutral if that thread dies or stalls.
+        vecon.set_throttle(joystick.read_throttle())
+        vecon.set_steering(joystick.get_axis("LEFT_X", limit_perc=70),
+                           joystick.get_axis("RIGHT_X", limit_perc=70))
+
+    def actuate():
+        # Send this tick's servo changes in one burst
+        vecon.flush()
+
+    def record_telemetry():
+        state = vecon.get_state()
+        telemetry.record_state(state)
+        if state != vehicle_state.get("last"):
+            log.log("info", "Vehicle State Change", f"New state: {state}")
+            log.csv("log/vehicle_state_log.csv", "Vehicle State Change", state)
+            vehicle_state["last"] = state
+
+    if drive:
+        scheduler.add_task("joystick", 100, read_joystick)
+    if person_follower.pan_tilt_controller is not None:
+        # Registered before actuation so its commands go out in the same tick
+        scheduler.add_task("pantilt", 50, person_follower.control_step)
+    scheduler.add_task("actuation", 50, actuate)
+    scheduler.add_task("telemetry", 10, record_telemetry)
+    if readback:
+        # Reads the ESC and PCA9685 back over pigpio/I2C on the control thread
+        scheduler.add_task("readback", 1, vecon.check_consistency)
+    if governor is not None:
+        scheduler.add_task("governor", 1, governor.step)
+    return scheduler
+
+def print_scheduler_stats(scheduler: sc.ControlScheduler):
+    for name, stats in scheduler.get_stats().items():
+        jitter = stats["jitter"]
+        if jitter is None:
+            continue
+        print(f"[{name}] {stats['rate_hz']} Hz, {stats['runs']} runs, {stats['overruns']} overruns, "
+              f"jitter p50 {jitter['p50']:.2f} ms / p99 {jitter['p99']:.2f} ms")
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Crawler vehicle control")
+    parser.add_argument("--cameras", nargs="+", default=["0"], metavar="CAMERA",
+                        help="USB camera indexes or device paths; the first is on the pan/tilt mount, "
+                             "the others are analyzed in the same batch")
+    parser.add_argument("--replay", nargs="+", metavar="PATH",
+                        help="replay recorded video files or frame directories (one per camera) instead of USB cameras")
+    parser.add_argument("--replay-mode", choices=["realtime", "fixed", "fast"], default="realtime",
+                        help="replay pacing: recorded speed, fixed --fps, or as fast as possible")
+    parser.add_argument("--fps", type=int, default=30, help="camera FPS (or replay FPS in fixed mode)")
+    parser.add_argument("--resolution", type=parse_resolution, default=None, metavar="WxH",
+                        help="capture resolution, e.g. 640x480 (default: whatever the camera starts in)")
+    parser.add_argument("--camera-format", choices=["MJPG", "YUYV"], default=None,
+                        help="camera pixel format; MJPG allows higher resolutions at full frame rate")
+    parser.add_argument("--engine", choices=["tflite", "keras"], default="tflite",
+                        help="inference engine; keras is used as a fallback if the .tflite model can't be loaded")
+    parser.add_argument("--threads", type=int, default=None, help="TFLite interpreter threads (default: all cores)")
+    parser.add_argument("--localization", choices=["classify", "detect"], default="classify",
+                        help="classify the whole frame, or detect and track person boxes with MoveNet")
+    parser.add_argument("--tracker", choices=["flow", "kcf", "csrt", "mil"], default="flow",
+                        help="tracker used between detections")
+    parser.add_argument("--backend", choices=["hardware", "sim"], default="hardware",
+                        help="drive the real ESC/PCA9685/joystick, or simulated ones with modelled bus latency")
+    parser.add_argument("--detect-interval", type=int, default=10, help="run full detection every N frames")
+    parser.add_argument("--pan-tilt", choices=["step", "predictive"], default="step",
+                        help="fixed step per frame, or latency-compensating predictive control at the control rate")
+    parser.add_argument("--drive", action="store_true", help="drive throttle and steering from the joystick")
+    parser.add_argument("--headless", action="store_true",
+                        help="no Qt dashboard; serve the annotated stream and telemetry over HTTP instead")
+    parser.add_argument("--stream-port", type=int, default=8080, help="HTTP port for --headless")
+    parser.add_argument("--no-pose-overlay", action="store_true",
+                        help="don't draw MoveNet skeletons on the annotated frame (detect mode)")
+    parser.add_argument("--motion-gate", action="store_true",
+                        help="skip the model on frames where nothing moved, reusing the last result")
+    parser.add_argument("--inference-process", action="store_true",
+                        help="run preprocessing and inference in a supervised worker process")
+    parser.add_argument("--governor", action="store_true",
+                        help="adapt resolution, model input size and inference rate to hold --target-latency")
+    parser.add_argument("--target-latency", type=float, default=150.0,
+                        help="glass-to-command p95 latency (ms) the governor aims for; "
+                             "the servo write follows within one control period")
+    parser.add_argument("--readback", action="store_true",
+                        help="read the ESC and servos back once a second and log any mismatch with the commanded state")
+    parser.add_argument("--profile-startup", action="store_true", help="print a per-phase startup timing breakdown")
+    args = parser.parse_args()
+    if args.localization == "detect" and args.tracker != "flow":
         try:
-            while True:
-                # joystick.update_connection_status()
-                # if not joystick.is_connected():
-                #     joystick.wait_for_connection()
-
-                # pygame.event.pump()
-                # throttle = joystick.read_throttle()
-                # steering_front = joystick.get_axis("LEFT_X", limit_perc=70)
-                # steering_rear = joystick.get_axis("RIGHT_X", limit_perc=70)
-
-                # vecon.set_throttle(throttle)
-                # vecon.set_steering(steering_front, steering_rear)
-
-                # new_vehicle_state = vecon.get_state()
-
-                # if new_vehicle_state != vehicle_state:
-                #     log.log("info", "Vehicle State Change", f"New state: {new_vehicle_state}")
-                #     log.csv("log/vehicle_state_log.csv", "Vehicle State Change", new_vehicle_state)
-
-                # vehicle_state = new_vehicle_state
+            cv_tracker_factory(args.tracker)
+        except RuntimeError as e:
+            parser.error(str(e))
+    return args
 
-                # # Throttle console output to every 10th frame
-                # if frame_counter % 10 == 0:
-                #     print(f"Vehicle State: {vehicle_state}", end="\r", flush=True)
-
-                # frame_counter += 1
-                person_follower.process_and_adjust()
-
-                await asyncio.sleep(0.01)
-        except KeyboardInterrupt:
-            print("\n[Shutdown] Stopping ESC and Servos...")
-        finally:
-            vecon.close()
+def parse_resolution(value):
+    try:
+        width, height = (int(part) for part in value.lower().split("x"))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"expected WIDTHxHEIGHT, got {value!r}")
+    return width, height
+
+def load_model(args, profile: StartupProfile):
+    # Runs on a worker thread while the hardware comes up
+    with profile.phase("model load"):
+        engine = pf.build_engine(args.localization, args.engine, num_threads=args.threads)
+    with profile.phase("model warm-up"):
+        warm_up(engine)
+    return engine
 
 if __name__ == "__main__":
-    pygame.init()
-    log = lg.Logger()
-
-    joystick = js.Joystick(disabled=True)
-    vecon = vc.VehicleController(logger=log)
-    usb_cam = uc.USBCamera(camera_index=0, fps=30)
-    person_follower = pf.PersonFollower(vecon, usb_cam)
-
-    person_follower.start()  # Start AI processing thread
-
-    app = QApplication(sys.argv)
-    dashboard = db.Dashboard(person_follower)
-    dashboard.show()    
-
-    # Run the asyncio control loop in a separate thread
-    loop = asyncio.get_event_loop()
-    asyncio_thread = threading.Thread(target=loop.run_until_complete, args=(control_loop(joystick, vecon, person_follower),))
-    asyncio_thread.start()
+    args = parse_args()
+    profile = StartupProfile(start=STARTED)
+    profile.record("imports", STARTED, time.perf_counter())
+
+    # Model loading and the first (slow) inference overlap hardware init.
+    # An inference process loads its own model once the follower starts it.
+    if not args.inference_process:
+        model_loader = ThreadPoolExecutor(max_workers=1, thread_name_prefix="model")
+        engine_future = model_loader.submit(load_model, args, profile)
+
+    with profile.phase("logger"):
+        log = lg.Logger(queued=True)
+
+    with profile.phase("joystick"):
+        if args.backend == "sim":
+            joystick = hb.SimJoystick()
+        else:
+            import Joystick as js
+            if args.drive:
+                import pygame
+                pygame.init()
+            joystick = js.JoystickService(disabled=not args.drive)
+        joystick.start()
+    with profile.phase("vehicle controller"):
+        vecon = vc.VehicleController(logger=log, coalesce_writes=True, backend=args.backend)
+    with profile.phase("camera"):
+        if args.replay:
+            import ReplayCamera as rc
+            usb_cams = [rc.ReplayCamera(path, mode=args.replay_mode, fps=args.fps) for path in args.replay]
+            if args.resolution:
+                for usb_cam in usb_cams:
+                    usb_cam.set_resolution(*args.resolution)
+        else:
+            import USBCamera as uc
+            width, height = args.resolution or (None, None)
+            usb_cams = [uc.USBCamera(camera_index=int(camera) if camera.isdigit() else 0,
+                                     device_path=None if camera.isdigit() else camera,
+                                     fps=args.fps, threaded=True, width=width, height=height, fourcc=args.camera_format)
+                        for camera in args.cameras]
+    telemetry = tm.TelemetryRecorder(f"log/telemetry_{datetime.now().strftime('%Y%m%d_%H%M%S')}.tlm")
+
+    if args.inference_process:
+        engine = args.engine
+    else:
+        with profile.phase("wait for model"):
+            engine = engine_future.result()
+            model_loader.shutdown()
+    with profile.phase("person follower"):
+        person_follower = pf.PersonFollower(vecon, usb_cams, engine=engine, num_threads=args.threads,
+                                            inference_process=args.inference_process, motion_gate=args.motion_gate,
+                                            draw_poses=not args.no_pose_overlay,
+                                            localization=args.localization, tracker=args.tracker,
+                                            detect_interval=args.detect_interval, telemetry=telemetry,
+                                            pan_tilt_mode=args.pan_tilt, manual_override=joystick.manual_override)
+        person_follower.start()  # Start AI processing thread
+
+    governor = None
+    if args.governor:
+        import Governor as gv
+        governor = gv.Governor(person_follower, usb_cams[0], target_latency_ms=args.target_latency)
+
+    # Run the fixed-rate control tasks on their own thread
+    scheduler = build_scheduler(joystick, vecon, person_follower, telemetry, log, drive=args.drive,
+                                governor=governor, readback=args.readback)
+
+    stream_server = None
+    with profile.phase("user interface"):
+        if args.headless:
+            import StreamServer as ss
+            stream_server = ss.StreamServer(
+                frame_source=person_follower.read_latest_frame,
+                telemetry_source=lambda: {"vehicle": vecon.get_state(),
+                                          "pipeline": person_follower.get_stats(),
+                                          "cameras": person_follower.get_camera_results(),
+                                          "scheduler": scheduler.get_stats(),
+                                          "governor": governor.get_state() if governor else None},
+                port=args.stream_port)
+            stream_server.start()
+        else:
+            from PyQt5.QtWidgets import QApplication
+            import Dashboard as db
+            app = QApplication(sys.argv)
+            dashboard = db.Dashboard(person_follower)
+            dashboard.show()
+
+    with profile.phase("scheduler"):
+        scheduler.start()
+
+    if args.profile_startup:
+        print(profile.format())
 
     try:
-        sys.exit(app.exec_())
+        if stream_server is not None:
+            print(f"[Stream] Serving on http://{stream_server.address[0]}:{stream_server.address[1]}/")
+            threading.Event().wait()  # Until Ctrl+C
+        else:
+            sys.exit(app.exec_())
+    except KeyboardInterrupt:
+        pass
     finally:
-        person_follower.stop()  # Stop AI processing thread
+        print("\n[Shutdown] Stopping ESC and Servos...")
+        if stream_server is not None:
+            stream_server.stop()
+        scheduler.stop()
+        joystick.stop()
+        person_follower.stop()  # Stop AI processing threads
+        print_scheduler_stats(scheduler)
+        telemetry.close()
+        vecon.close()
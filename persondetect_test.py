@@ -3,6 +3,7 @@ import numpy as np
 import tensorflow as tf
 import os
 import time
+from PoseEstimation import decode_poses, draw_poses
 
 # Load the SavedModel
 def load_saved_model(model_dir):
@@ -22,40 +23,12 @@ def preprocess_image(image, input_shape):
     image = np.array(image, dtype=np.int32)  # Cast to INT32 as required by the model
     return image
 
-# Function to draw only high-confidence keypoints and skeleton
+# Draw only high-confidence boxes, keypoints and skeleton
 def draw_pose_estimation(image, outputs):
-    keypoint_pairs = [
-        (0, 1), (0, 2), (1, 3), (2, 4),  # Head
-        (5, 6), (5, 7), (7, 9), (6, 8), (8, 10),  # Arms
-        (11, 12), (11, 13), (13, 15), (12, 14), (14, 16)  # Legs
-    ]
-
     h, w, _ = image.shape
-    for person in outputs[0]:
-        keypoints = person[:51].reshape((17, 3))  # Extract keypoints
-        ymin, xmin, ymax, xmax, score = person[-5:]  # Bounding box and confidence
-
-        # Draw bounding box if confidence is high
-        if score > 0.5:  # Reasonable threshold for bounding box
-            start_point = (max(0, int(xmin * w)), max(0, int(ymin * h)))
-            end_point = (min(w, int(xmax * w)), min(h, int(ymax * h)))
-            cv2.rectangle(image, start_point, end_point, (0, 255, 0), 2)  # Green box
-
-        print("Keypoints (filtered and scaled to image):")
-        for i, (y, x, confidence) in enumerate(keypoints):
-            if confidence > 0.5:  # Show only high-confidence keypoints
-                scaled_x, scaled_y = int(x * w), int(y * h)
-                print(f"Joint {i}: ({scaled_x}, {scaled_y}), Confidence: {confidence}")
-                cv2.circle(image, (scaled_x, scaled_y), 5, (0, 0, 255), -1)  # Red keypoint
-
-        for start, end in keypoint_pairs:
-            y1, x1, c1 = keypoints[start]
-            y2, x2, c2 = keypoints[end]
-            if c1 > 0.5 and c2 > 0.5:  # Show only high-confidence connections
-                start_point = (int(x1 * w), int(y1 * h))
-                end_point = (int(x2 * w), int(y2 * h))
-                cv2.line(image, start_point, end_point, (255, 0, 0), 2)  # Blue skeleton
-    return image
+    # Skeletons for every candidate; boxes only for confident people
+    poses = decode_poses(outputs[0], w, h, score_threshold=None, keypoint_threshold=0.5)
+    return draw_poses(image, poses, box_threshold=0.5)
 
 # Save preprocessed input for debugging
 def save_preprocessed_input(image, filename="preprocessed_input.jpg"):
@@ -0,0 +1,15 @@
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def test_sim_backends_run_without_pygame():
+    # A fresh interpreter, so nothing else in the test run has loaded pygame
+    code = ("import sys, HardwareBackends as hb\n"
+            "esc, pca = hb.create_backends('sim', 18, 50)\n"
+            "joystick = hb.SimJoystick()\n"
+            "joystick.set_axis('RT', 1.0)\n"
+            "assert joystick.read_throttle() == 1.0\n"
+            "assert 'pygame' not in sys.modules\n")
+    subprocess.run([sys.executable, "-c", code], cwd=ROOT, check=True)
@@ -0,0 +1,37 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PersonDetector import MoveNetDetector
+
+class FixedBatchEngine:
+    '''Engine whose model only runs a batch of 1, like some converted .tflite files.'''
+    input_dtype = np.uint8
+
+    def __init__(self):
+        self.resize_input((1, 64, 64, 3))
+        self.seen = []  # Largest input value of each call
+
+    def resize_input(self, input_shape):
+        self.input_shape = tuple(input_shape)
+        self.input_buffer = np.zeros(self.input_shape, dtype=self.input_dtype)
+
+    def predict(self, batch):
+        if batch.shape[0] != 1:
+            raise RuntimeError("batch of 1 baked into the model")
+        self.seen.append(int(batch.max()))
+        return np.zeros((1, 6, 56), dtype=np.float32)
+
+def test_detect_batch_falls_back_to_single_frames_on_live_input():
+    engine = FixedBatchEngine()
+    detector = MoveNetDetector(engine)
+    frames = [np.full((48, 64, 3), 200, dtype=np.uint8), np.full((48, 64, 3), 100, dtype=np.uint8)]
+
+    poses = detector.detect_batch(frames)
+
+    assert len(poses) == 2
+    assert not detector.batching
+    assert engine.seen == [200, 100]
+    assert np.shares_memory(detector.preprocessor.input, engine.input_buffer)
@@ -0,0 +1,27 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Joystick import shape_axis
+
+def test_deadzone_reads_zero():
+    assert shape_axis(0.0) == 0.0
+    assert shape_axis(0.05, deadzone=0.05) == 0.0
+    assert shape_axis(-0.04, deadzone=0.05) == 0.0
+
+def test_full_deflection_still_reaches_one():
+    assert shape_axis(1.0, deadzone=0.1, expo=0.5) == pytest.approx(1.0)
+    assert shape_axis(-1.0, deadzone=0.1, expo=0.5) == pytest.approx(-1.0)
+
+def test_outside_the_deadzone_is_rescaled():
+    assert shape_axis(0.525, deadzone=0.05) == pytest.approx(0.5)
+    assert shape_axis(-0.525, deadzone=0.05) == pytest.approx(-0.5)
+
+def test_expo_softens_the_centre():
+    assert shape_axis(0.525, deadzone=0.05, expo=1.0) == pytest.approx(0.125)
+    assert shape_axis(0.525, deadzone=0.05, expo=0.3) == pytest.approx(0.7 * 0.5 + 0.3 * 0.125)
+
+def test_out_of_range_input_is_clamped():
+    assert shape_axis(1.2) == 1.0
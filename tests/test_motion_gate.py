@@ -0,0 +1,57 @@
+import os
+import sys
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from MotionGate import MotionGate
+
+def frame(value=100):
+    # 2x the thumbnail size, so each 8x8 thumbnail block is a 16x16 patch
+    return np.full((96, 128, 3), value, dtype=np.uint8)
+
+def test_first_frame_always_runs():
+    assert MotionGate().should_run(frame(), now=0.0)
+
+def test_still_scene_is_skipped_until_the_refresh_interval():
+    gate = MotionGate(refresh_interval=1.0)
+    gate.should_run(frame(), now=0.0)
+
+    assert not gate.should_run(frame(), now=0.5)
+    assert gate.should_run(frame(), now=1.0)
+    assert gate.get_stats()["skipped"] == 1
+
+def test_one_moving_block_opens_the_gate():
+    gate = MotionGate(refresh_interval=10.0)
+    gate.should_run(frame(), now=0.0)
+    moved = frame()
+    moved[32:48, 64:80] = 200  # Exactly one thumbnail block
+
+    assert gate.should_run(moved, now=0.1)
+    assert gate.score == pytest.approx(100)
+
+def test_small_changes_add_up_against_the_last_analyzed_frame():
+    gate = MotionGate(block_threshold=6.0, refresh_interval=10.0)
+    gate.should_run(frame(100), now=0.0)
+
+    assert not gate.should_run(frame(103), now=0.1)  # 3 < 6
+    assert gate.should_run(frame(106), now=0.2)      # Still compared with 100
+
+def test_any_camera_moving_opens_the_gate():
+    gate = MotionGate(refresh_interval=10.0, cameras=2)
+    gate.should_run(frame(), frame(), now=0.0)
+
+    assert not gate.should_run(frame(), frame(), now=0.1)
+    assert gate.should_run(frame(), frame(200), now=0.2)
+
+def test_reset_forces_the_next_run():
+    gate = MotionGate(refresh_interval=10.0)
+    gate.should_run(frame(), now=0.0)
+    gate.reset()
+
+    assert gate.should_run(frame(), now=0.1)
+
+def test_thumbnail_must_fit_whole_blocks():
+    with pytest.raises(ValueError):
+        MotionGate(size=(60, 48), block=8)
@@ -0,0 +1,32 @@
+import os
+import sys
+import threading
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Pipeline import LatestQueue
+
+def test_full_queue_drops_the_oldest_item():
+    dropped = []
+    queue = LatestQueue(maxsize=2, on_drop=dropped.append)
+    for item in "abcd":
+        queue.put(item)
+
+    assert dropped == ["a", "b"]
+    assert queue.dropped == 2
+    assert queue.get(timeout=0) == "c"
+    assert queue.get(timeout=0) == "d"
+
+def test_get_times_out_empty():
+    assert LatestQueue().get(timeout=0.01) is None
+
+def test_close_wakes_a_waiting_consumer():
+    queue = LatestQueue()
+    results = []
+    consumer = threading.Thread(target=lambda: results.append(queue.get(timeout=5)))
+    consumer.start()
+    queue.close()
+    consumer.join(timeout=1)
+
+    assert not consumer.is_alive()
+    assert results == [None]
@@ -0,0 +1,43 @@
+import os
+import sys
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ReplayCamera import ReplayCamera
+
+def write_frames(directory, values):
+    for index, value in enumerate(values):
+        cv2.imwrite(str(directory / f"{index:04d}.png"), np.full((24, 32, 3), value, dtype=np.uint8))
+
+def test_unreadable_frames_are_skipped(tmp_path):
+    write_frames(tmp_path, [10, 20])
+    (tmp_path / "0000_truncated.png").write_bytes(b"not a png")
+    camera = ReplayCamera(str(tmp_path), mode="fast", loop=True)
+    camera.set_resolution(16, 12)
+
+    values = [camera.read()[0].mean() for _ in range(4)]
+
+    assert values == [10, 20, 10, 20]
+    assert camera.frame_size == (16, 12)
+
+def test_directory_without_readable_frames_fails_clearly(tmp_path):
+    (tmp_path / "broken.jpg").write_bytes(b"")
+    camera = ReplayCamera(str(tmp_path), mode="fast", loop=True)
+
+    with pytest.raises(RuntimeError, match="No readable frames"):
+        camera.read()
+
+def test_fps_change_rebases_the_schedule(tmp_path):
+    write_frames(tmp_path, [0])
+    camera = ReplayCamera(str(tmp_path), mode="fixed", fps=100, loop=True)
+    due = []
+    for fps in (100, 100, 50, 50):
+        camera.set_fps(fps)
+        camera.read()
+        due.append(camera.last_due)
+
+    # Each frame is one interval (at the rate in force) after the one before
+    assert np.diff(due) == pytest.approx([0.01, 0.02, 0.02])
@@ -0,0 +1,84 @@
+import os
+import sys
+import types
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import Scheduler
+from Scheduler import ControlScheduler
+
+class FakeClock:
+    '''Stands in for time.perf_counter and the stop event, so waits take no real time.'''
+
+    def __init__(self):
+        self.now = 0.0
+        self.stopped = False
+
+    def perf_counter(self):
+        return self.now
+
+    def wait(self, delay):
+        self.now += delay
+        return self.stopped
+
+    def is_set(self):
+        return self.stopped
+
+    def set(self):
+        self.stopped = True
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(Scheduler, "time", types.SimpleNamespace(perf_counter=clock.perf_counter))
+    return clock
+
+def run(scheduler, clock, name, runs):
+    scheduler.stop_event = clock
+    task = scheduler.tasks[0]
+    original = task.fn
+
+    def counted():
+        try:
+            original()
+        finally:
+            if task.runs + 1 == runs:
+                clock.set()
+    task.fn = counted
+    scheduler.run()
+    return scheduler.get_stats()[name]
+
+def test_task_within_its_period_never_overruns(clock):
+    scheduler = ControlScheduler()
+    scheduler.add_task("fast", 100, lambda: setattr(clock, "now", clock.now + 0.004))
+
+    stats = run(scheduler, clock, "fast", 5)
+
+    assert stats["runs"] == 5
+    assert stats["overruns"] == 0
+    assert clock.now == pytest.approx(0.044)  # Four full periods, then the last run
+
+def test_overrun_counts_missed_ticks_and_keeps_the_phase(clock):
+    scheduler = ControlScheduler()
+    scheduler.add_task("slow", 100, lambda: setattr(clock, "now", clock.now + 0.025))
+
+    stats = run(scheduler, clock, "slow", 4)
+
+    # Each 25 ms run misses two 10 ms ticks; the next starts on the grid
+    assert stats["runs"] == 4
+    assert stats["overruns"] == 8
+    assert stats["jitter"]["max"] == pytest.approx(0.0)
+
+def test_failing_task_keeps_the_schedule_running(clock):
+    scheduler = ControlScheduler()
+
+    def fail():
+        clock.now += 0.001
+        raise RuntimeError("bus error")
+    scheduler.add_task("flaky", 50, fail)
+
+    stats = run(scheduler, clock, "flaky", 3)
+
+    assert stats["runs"] == 3
+    assert stats["overruns"] == 0
@@ -0,0 +1,53 @@
+import os
+import sys
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from HardwareBackends import SimPCA9685
+from ServoBus import LED0_ON_L, REGISTERS_PER_CHANNEL, ServoBus
+
+def make_bus(**options):
+    pca = SimPCA9685(50)
+    pca.i2c_device.overhead = 0.0
+    pca.i2c_device.bus_hz = 1e12  # Don't wait on the simulated wire
+    return ServoBus(pca, **options), pca.i2c_device
+
+def test_neighbouring_channels_share_a_burst():
+    bus, device = make_bus()
+    bus.set_angle(0, 90)
+    bus.set_angle(1, 45)
+    bus.set_angle(3, 10)
+
+    assert bus.flush() == 2
+    (_, first, payload), (_, second, _) = device.transactions
+    assert first == LED0_ON_L and len(payload) == 2 * REGISTERS_PER_CHANNEL
+    assert second == LED0_ON_L + 3 * REGISTERS_PER_CHANNEL
+    assert bus.read_angle(0) == pytest.approx(90, abs=0.5)
+    assert bus.read_angle(3) == pytest.approx(10, abs=0.5)
+
+def test_unchanged_angles_are_not_resent():
+    bus, device = make_bus()
+    bus.set_angle(0, 90)
+    bus.flush()
+
+    bus.set_angle(0, 90)
+    assert bus.flush() == 0
+    assert bus.skipped == 1
+    assert len(device.transactions) == 1
+    assert bus.flush(force=True) == 0  # Nothing staged
+
+    bus.set_angle(0, 90)
+    assert bus.flush(force=True) == 1
+
+def test_rate_limited_channel_keeps_its_newest_value():
+    bus, device = make_bus(rate_limits={0: 0.001})
+    bus.set_angle(0, 90)
+    bus.flush(force=True)
+
+    bus.set_angle(0, 30)
+    bus.set_angle(0, 60)
+    assert bus.flush() == 0
+    assert bus.pending == {0: bus.angle_to_counts(60)}
+    assert bus.flush(force=True) == 1
+    assert bus.read_angle(0) == pytest.approx(60, abs=0.5)
@@ -0,0 +1,72 @@
+import json
+import os
+import sys
+import time
+import urllib.request
+from contextlib import contextmanager
+import cv2
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from StreamServer import MJPEG_BOUNDARY, StreamServer
+
+class CountingSource:
+    '''Frame source that publishes a new frame on every read, like a running follower.'''
+
+    def __init__(self):
+        self.frame = np.zeros((48, 64, 3), dtype=np.uint8)
+        self.frame[:, 32:] = 255
+        self.seq = 0
+
+    @contextmanager
+    def __call__(self):
+        self.seq += 1
+        yield self.seq, self.frame
+
+@pytest.fixture
+def server():
+    server = StreamServer(CountingSource(), lambda: {"vehicle": {"throttle": 1500}, "fps": 30.0},
+                          host="127.0.0.1", port=0)
+    server.start()
+    yield server
+    server.stop()
+
+def url(server, path):
+    host, port = server.address[:2]
+    return f"http://{host}:{port}{path}"
+
+def test_snapshot_is_a_jpeg_of_the_latest_frame(server):
+    with urllib.request.urlopen(url(server, "/snapshot.jpg"), timeout=5) as response:
+        assert response.headers["Content-Type"] == "image/jpeg"
+        image = cv2.imdecode(np.frombuffer(response.read(), dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (48, 64, 3)
+    assert image[:, :24].mean() < 10 and image[:, 40:].mean() > 245
+
+def test_telemetry_is_the_source_as_json(server):
+    with urllib.request.urlopen(url(server, "/telemetry"), timeout=5) as response:
+        assert response.headers["Content-Type"] == "application/json"
+        assert json.loads(response.read()) == {"vehicle": {"throttle": 1500}, "fps": 30.0}
+
+def test_mjpeg_stream_sends_jpeg_parts(server):
+    with urllib.request.urlopen(url(server, "/stream.mjpg"), timeout=5) as response:
+        assert response.headers["Content-Type"] == f"multipart/x-mixed-replace; boundary={MJPEG_BOUNDARY}"
+        assert response.readline() == f"--{MJPEG_BOUNDARY}\r\n".encode()
+        headers = {}
+        for line in iter(response.readline, b"\r\n"):
+            name, value = line.decode().split(":", 1)
+            headers[name] = value.strip()
+        assert headers["Content-Type"] == "image/jpeg"
+        jpeg = response.read(int(headers["Content-Length"]))
+    image = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_COLOR)
+    assert image.shape == (48, 64, 3)
+
+def test_encoder_stops_when_the_last_viewer_leaves(server):
+    with urllib.request.urlopen(url(server, "/snapshot.jpg"), timeout=5) as response:
+        response.read()
+    deadline = time.monotonic() + 2.0
+    while server.encoder.thread is not None and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert server.encoder.clients == 0
+    assert server.encoder.thread is None
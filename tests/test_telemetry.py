@@ -0,0 +1,44 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from Telemetry import SOURCE_FOLLOWER, SOURCE_VEHICLE, TelemetryRecorder, load_session, read_header
+
+def test_records_round_trip_through_the_file(tmp_path):
+    path = str(tmp_path / "session.tlm")
+    recorder = TelemetryRecorder(path, block_records=2)  # Forces a block write mid-session
+    recorder.record_state({"throttle": 1500, "front_s": 90, "rear_s": 85, "pan": None, "tilt": 100})
+    recorder.record_decision(7, 320, 240, 95, 80)
+    recorder.record_decision(8, None, None, 95, 80)
+    recorder.close()
+
+    meta, _ = read_header(path)
+    records = load_session(path)
+
+    assert "start" in meta
+    assert len(records) == 3
+    assert list(records["source"]) == [SOURCE_VEHICLE, SOURCE_FOLLOWER, SOURCE_FOLLOWER]
+    assert records[0]["throttle"] == 1500 and records[0]["rear_s"] == 85
+    assert np.isnan(records[0]["pan"]) and np.isnan(records[0]["person_x"])
+    assert records[1]["frame_seq"] == 7 and records[1]["detected"] == 1
+    assert (records[1]["person_x"], records[1]["person_y"]) == (320, 240)
+    assert records[2]["detected"] == 0 and np.isnan(records[2]["person_x"])
+    assert np.all(np.diff(records["time"]) >= 0)
+
+def test_trailing_partial_record_is_ignored(tmp_path):
+    path = str(tmp_path / "session.tlm")
+    recorder = TelemetryRecorder(path)
+    recorder.record_decision(1, 10, 20, 90, 90)
+    recorder.close()
+    with open(path, "ab") as f:
+        f.write(b"\0" * 5)  # Crashed mid-write
+
+    assert len(load_session(path)) == 1
+
+def test_empty_session_loads(tmp_path):
+    path = str(tmp_path / "session.tlm")
+    TelemetryRecorder(path).close()
+
+    assert len(load_session(path)) == 0